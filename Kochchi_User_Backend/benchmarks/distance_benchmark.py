@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Distance Scoring Benchmark
+Compares the per-ad scalar haversine loop with the vectorized batch scorer.
+
+Usage:
+    python benchmarks/distance_benchmark.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.distance_radius_calculator import calculate_distance, batch_distances
+
+ORIGIN = (6.9271, 79.8612)  # Colombo
+SIZES = [10_000, 100_000]
+REPEATS = 5
+
+
+def make_points(count: int):
+    rng = random.Random(42)
+    lats = [rng.uniform(5.9, 9.9) for _ in range(count)]
+    lngs = [rng.uniform(79.5, 81.9) for _ in range(count)]
+    return lats, lngs
+
+
+def scalar(lats, lngs):
+    return [calculate_distance(ORIGIN[0], ORIGIN[1], lat, lng) for lat, lng in zip(lats, lngs)]
+
+
+def vectorized(lats, lngs):
+    return batch_distances(ORIGIN[0], ORIGIN[1], lats, lngs)
+
+
+def main():
+    print(f"{'ads':>8} {'scalar ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        lats, lngs = make_points(size)
+        scalar_s = min(timeit.repeat(lambda: scalar(lats, lngs), number=1, repeat=REPEATS))
+        batch_s = min(timeit.repeat(lambda: vectorized(lats, lngs), number=1, repeat=REPEATS))
+        print(f"{size:>8} {scalar_s * 1000:>10.2f} {batch_s * 1000:>10.2f} {scalar_s / batch_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Ad Flattening Benchmark
+Per-ad cost of building the flattened listing item: the hand-written dict the
+listings used to build (plus the ?fields= pruning pass) vs the compiled flattener.
+
+Usage:
+    python benchmarks/flatten_benchmark.py
+"""
+
+import os
+import sys
+import timeit
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_encoding_benchmark import make_ad
+from utils.ads.ad_fields import FIELD_PROFILES, FLAT_FIELD_SOURCES, includes
+from utils.ads.ad_flatten import flattener
+
+ADS = 2000
+REPEATS = 5
+
+
+def handwritten(ad):
+    contact = ad.get("contact", {})
+    location = ad.get("location", {})
+    business = ad.get("business", {})
+    schedule = ad.get("schedule", {})
+    adSettings = ad.get("adSettings", {})
+    approval = ad.get("approval", {})
+    reactions = ad.get("reactions", {})
+    recommendations = ad.get("recommendations", {})
+    return {
+        "ad_id": str(ad["_id"]),
+        "title": ad.get("shopName", "Untitled Ad"),
+        "image_url": ad.get("images", [None])[0] if ad.get("images") else None,
+        "priority_score": 0,
+        "shopName": ad.get("shopName", ""),
+        "contact_address": contact.get("address", ""),
+        "contact_phone": contact.get("phone", ""),
+        "contact_whatsapp": contact.get("whatsapp"),
+        "contact_email": contact.get("email"),
+        "contact_website": contact.get("website"),
+        "location_googleMapLocation": location.get("googleMapLocation"),
+        "location_city": location.get("city", ""),
+        "location_district": location.get("district", ""),
+        "location_province": location.get("province"),
+        "location_country": location.get("country", "Sri Lanka"),
+        "location_state": location.get("state"),
+        "business_category": business.get("category", ""),
+        "business_specialty": business.get("specialty"),
+        "business_tags": business.get("tags", []),
+        "business_halalAvailable": business.get("halalAvailable", False),
+        "business_description": business.get("description"),
+        "business_menuOptions": business.get("menuOptions", []),
+        "schedule_mon": schedule.get("mon", []),
+        "schedule_tue": schedule.get("tue", []),
+        "schedule_wed": schedule.get("wed", []),
+        "schedule_thu": schedule.get("thu", []),
+        "schedule_fri": schedule.get("fri", []),
+        "schedule_sat": schedule.get("sat", []),
+        "schedule_sun": schedule.get("sun", []),
+        "isTopAd": adSettings.get("isTopAd", False),
+        "isCarousalAd": adSettings.get("isCarousalAd", False),
+        "hasHalal": adSettings.get("hasHalal", False),
+        "images": ad.get("images", []),
+        "videoUrl": ad.get("videoUrl"),
+        "approval_status": approval.get("status", ""),
+        "approval_adminId": approval.get("adminId"),
+        "approval_adminComment": approval.get("adminComment"),
+        "approval_approvedAt": approval.get("approvedAt"),
+        "likes_count": reactions.get("likes", {}).get("count", 0),
+        "unlikes_count": reactions.get("unlikes", {}).get("count", 0),
+        "recommendations_count": recommendations.get("count", 0),
+        "visibility": ad.get("visibility", ""),
+        "expiryDate": ad.get("expiryDate"),
+        "createdAt": ad.get("createdAt"),
+        "updatedAt": ad.get("updatedAt"),
+    }
+
+
+def prune_flat(flat, projection):
+    # The per-item ?fields= pass the listings ran before the flattener was compiled per projection
+    return {
+        key: value for key, value in flat.items()
+        if key not in FLAT_FIELD_SOURCES or includes(projection, FLAT_FIELD_SOURCES[key])
+    }
+
+
+def main():
+    ads = [make_ad(i) for i in range(ADS)]
+    card = FIELD_PROFILES["card"]
+    compiled = flattener(card)
+
+    assert [prune_flat(handwritten(ad), card) for ad in ads] == [compiled(ad) for ad in ads]
+
+    cases = {
+        "hand-written + prune": lambda: [prune_flat(handwritten(ad), card) for ad in ads],
+        "hand-written (no ?fields=)": lambda: [handwritten(ad) for ad in ads],
+        "compiled": lambda: [compiled(ad) for ad in ads],
+    }
+    print(f"{'variant':<28} {'us/ad':>7}")
+    for name, run in cases.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=REPEATS))
+        print(f"{name:<28} {seconds / ADS * 1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
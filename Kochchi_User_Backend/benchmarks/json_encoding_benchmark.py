@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+JSON Encoding Benchmark
+Compares FastAPI's default path for a raw ad listing (ObjectId conversion,
+jsonable_encoder, json.dumps) with the app's ORJSONResponse rendering.
+
+Usage:
+    python benchmarks/json_encoding_benchmark.py
+"""
+
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.responses.orjson_response import ORJSONResponse
+
+SIZES = [100, 500, 2000]
+REPEATS = 5
+
+
+def make_ad(i: int):
+    now = datetime(2025, 6, 1) + timedelta(minutes=i)
+    return {
+        "_id": ObjectId(),
+        "shopName": f"Shop {i}",
+        "contact": {"address": "12 Galle Road", "phone": "0771234567", "whatsapp": "0771234567",
+                    "email": "shop@example.com", "website": "https://example.com"},
+        "location": {"googleMapLocation": "6.9271,79.8612", "city": "Colombo", "district": "Colombo",
+                     "province": "Western", "country": "Sri Lanka", "state": None,
+                     "point": {"type": "Point", "coordinates": [79.8612, 6.9271]}},
+        "business": {"category": "Restaurants", "specialty": "Rice & Curry", "tags": ["spicy", "family"],
+                     "halalAvailable": True, "description": "Home-style Sri Lankan food " * 5,
+                     "menuOptions": [f"Dish {n}" for n in range(10)]},
+        "schedule": {day: ["10:00-22:00"] for day in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")},
+        "adSettings": {"isTopAd": i % 2 == 0, "isCarousalAd": i % 3 == 0, "hasHalal": True},
+        "images": [f"https://res.cloudinary.com/demo/image/upload/ads/{i}/{n}.jpg" for n in range(4)],
+        "approval": {"status": "approved", "adminId": "admin", "adminComment": None, "approvedAt": now},
+        "reactions": {"likes": {"count": i}, "unlikes": {"count": 0}},
+        "recommendations": {"count": 3},
+        "visibility": "visible",
+        "createdAt": now,
+        "updatedAt": now,
+        "expiryDate": now + timedelta(days=31),
+    }
+
+
+def convert_object_ids(doc):
+    # The per-route recursion the listings used before ORJSONResponse
+    if isinstance(doc, list):
+        return [convert_object_ids(item) for item in doc]
+    if isinstance(doc, dict):
+        return {k: str(v) if isinstance(v, ObjectId) else convert_object_ids(v) for k, v in doc.items()}
+    return doc
+
+
+def default_path(ads):
+    content = jsonable_encoder(convert_object_ids(ads))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_path(ads):
+    return ORJSONResponse(ads).body
+
+
+def main():
+    print(f"{'ads':>6} {'default ms':>11} {'orjson ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        ads = [make_ad(i) for i in range(size)]
+        default_s = min(timeit.repeat(lambda: default_path(ads), number=1, repeat=REPEATS))
+        orjson_s = min(timeit.repeat(lambda: orjson_path(ads), number=1, repeat=REPEATS))
+        print(f"{size:>6} {default_s * 1000:>11.2f} {orjson_s * 1000:>10.2f} {default_s / orjson_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -246,13 +246,10 @@ class AdListingPreview(BaseModel):
 
     # Reactions
     likes_count: Any
-    likes_userIds: Any
     unlikes_count: Any
-    unlikes_userIds: Any
 
     # Recommendations
     recommendations_count: Any
-    recommendations_userIds: Any
 
     visibility: Any
     expiryDate: Any
@@ -331,6 +328,14 @@ class SimplifiedAdPreview(BaseModel):
     contact_phone: Any
     priority_score: Any
 
+    class Config:
+        arbitrary_types_allowed = True
+        validate_assignment = False
+
+class SimplifiedAdPreviewPage(BaseModel):
+    results: List[SimplifiedAdPreview]
+    next_cursor: Optional[str]
+
     class Config:
         arbitrary_types_allowed = True
         validate_assignment = False
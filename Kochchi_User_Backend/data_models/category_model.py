@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 
 class Category(BaseModel):
     name: str = Field(...)
     description: Optional[str] = Field(...)
     image_url: Optional[str] = Field(...)
+    aliases: Optional[List[str]] = Field(default=None, description="Other spellings that should filter to this category")
 
 class CategoryResponse(Category):
     id: str = Field(..., example="665f29e12ba6a0a5d7e1c2b4")
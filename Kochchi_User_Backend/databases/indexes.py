@@ -0,0 +1,169 @@
+from typing import Dict, List, Any
+
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo.errors import OperationFailure
+
+from databases.mongo import db
+from utils.ads.ad_expiry import AD_TTL_GRACE_SECONDS
+
+# Every index the app relies on, per collection. Names are left to pymongo's
+# defaults (e.g. "userId_1") so indexes created before this registry match.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True, sparse=True),
+        IndexModel([("email", ASCENDING)], unique=True, sparse=True),
+        IndexModel([("role", ASCENDING)]),
+    ],
+    "ads": [
+        # $geoNear in /ads/filter and /ads/search distance sorting
+        IndexModel([("location.point", GEOSPHERE)]),
+        # Keyset pagination (createdAt, _id) for the ad listings
+        IndexModel([("approval.status", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("visibility", ASCENDING), ("approval.status", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("adSettings.isCarousalAd", ASCENDING), ("visibility", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("adSettings.isTopAd", ASCENDING), ("visibility", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        # /ads/export?status=all streams the whole collection newest first
+        IndexModel([("createdAt", DESCENDING), ("_id", DESCENDING)]),
+        # /ads/sorted-all walks this index in priority order
+        IndexModel([("visibility", ASCENDING), ("priority_score", DESCENDING), ("_id", DESCENDING)]),
+        # Normalized filter keys for /ads/filter and /ads/search
+        IndexModel([("categoryKey", ASCENDING), ("cityKey", ASCENDING), ("visibility", ASCENDING), ("approval.status", ASCENDING)]),
+        IndexModel([("cityKey", ASCENDING), ("visibility", ASCENDING), ("approval.status", ASCENDING)]),
+        # open_now / open_at: minute-of-week intervals ($elemMatch on s and e)
+        IndexModel([("openIntervals.s", ASCENDING), ("openIntervals.e", ASCENDING)]),
+        # /ads/my and the Stripe webhooks
+        IndexModel([("userId", ASCENDING)]),
+        IndexModel([("stripeSessionId", ASCENDING)], sparse=True),
+        # expire_ads.py walks purgeAt; the TTL backstop deletes what it missed (null for exempt ads)
+        IndexModel([("purgeAt", ASCENDING)], expireAfterSeconds=AD_TTL_GRACE_SECONDS),
+        # Weighted full-text index for /ads/search (one text index per collection)
+        IndexModel(
+            [
+                ("shopName", TEXT),
+                ("business.description", TEXT),
+                ("business.tags", TEXT),
+                ("business.specialty", TEXT),
+                ("location.city", TEXT),
+            ],
+            name="ads_text_search",
+            weights={
+                "shopName": 10,
+                "business.tags": 5,
+                "business.specialty": 5,
+                "location.city": 3,
+                "business.description": 1,
+            },
+            default_language="english"
+        ),
+    ],
+    "ad_reactions": [
+        # One reaction per (ad, user, kind); also serves per-ad lookups and cleanup
+        IndexModel([("adId", ASCENDING), ("userId", ASCENDING), ("kind", ASCENDING)], unique=True),
+    ],
+    "dansal": [
+        # TTL: MongoDB deletes dansals once endDateTime has passed
+        IndexModel([("endDateTime", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("userId", ASCENDING)]),
+        IndexModel([("createdAt", DESCENDING)]),
+    ],
+    "competitions": [
+        IndexModel([("createdAt", DESCENDING)]),
+    ],
+    "blogs": [
+        IndexModel([("createdAt", DESCENDING)]),
+    ],
+    "notifications": [
+        IndexModel([("createdAt", DESCENDING)]),
+    ],
+    "asset_cleanups": [
+        # Claims only need to outlive duplicate delete events
+        IndexModel([("claimedAt", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+# IndexOptionsConflict / IndexKeySpecsConflict: same keys or name, different options
+OPTION_CONFLICT_CODES = (85, 86)
+
+# Options that make two indexes with the same keys behave differently
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "weights")
+
+
+def _spec(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Comparable shape of an index, from an IndexModel document or index_information()"""
+    key = document["key"]
+    key = list(key.items()) if isinstance(key, dict) else [tuple(part) for part in key]
+    if any(kind == TEXT or field == "_fts" for field, kind in key):
+        key = "text"  # the server rewrites text keys to _fts/_ftsx; weights carry the fields
+    spec = {"key": key}
+    for option in COMPARED_OPTIONS:
+        value = document.get(option)
+        # `is`, not `in (None, False)`: expireAfterSeconds=0 == False but is a real TTL
+        if value is not None and value is not False:
+            spec[option] = value
+    return spec
+
+
+async def apply_indexes(database=db) -> Dict[str, List[str]]:
+    """Creates any missing index. Existing identical indexes are left alone, so this is safe on every start."""
+    created = {}
+    for collection_name, models in INDEXES.items():
+        created[collection_name] = []
+        for model in models:
+            # One at a time, so a conflicting index doesn't block the rest of the collection
+            try:
+                created[collection_name] += await database[collection_name].create_indexes([model])
+            except OperationFailure as e:
+                if e.code in OPTION_CONFLICT_CODES and "expireAfterSeconds" in model.document:
+                    created[collection_name] += await _make_ttl(database, collection_name, model)
+                    continue
+                # Usually an index with the same name but different options; see index_drift()
+                print(f"❌ Error creating index {model.document['name']} on {collection_name}: {e}")
+    return created
+
+
+async def _make_ttl(database, collection_name: str, model: IndexModel) -> List[str]:
+    """Turns an existing index with the same keys into the TTL index (or changes its expiry), in place"""
+    name = model.document["name"]
+    try:
+        await database.command({
+            "collMod": collection_name,
+            "index": {"name": name, "expireAfterSeconds": model.document["expireAfterSeconds"]},
+        })
+        print(f"⏳ {collection_name}.{name} is now a TTL index")
+        return [name]
+    except OperationFailure as e:
+        print(f"❌ Error making {collection_name}.{name} a TTL index: {e}")
+        return []
+
+
+async def index_drift(database=db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compares the registry with the indexes that exist.
+    Returns {collection: {"missing": [...], "changed": [...], "unexpected": [...]}} for collections that differ.
+    """
+    drift = {}
+    for collection_name, models in INDEXES.items():
+        existing = await database[collection_name].index_information()
+        existing.pop("_id_", None)
+        declared = {model.document["name"]: model.document for model in models}
+
+        missing = [name for name in declared if name not in existing]
+        changed = [
+            name for name in declared
+            if name in existing and _spec(declared[name]) != _spec(existing[name])
+        ]
+        unexpected = [name for name in existing if name not in declared]
+
+        if missing or changed or unexpected:
+            drift[collection_name] = {"missing": missing, "changed": changed, "unexpected": unexpected}
+    return drift
+
+
+def print_drift(drift: Dict[str, Dict[str, List[str]]]):
+    if not drift:
+        print("✅ Indexes match the registry.")
+        return
+    for collection_name, report in drift.items():
+        for kind, names in report.items():
+            if names:
+                print(f"⚠️ {collection_name}: {kind} indexes: {', '.join(names)}")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Ad Expiry Script
+Deletes ads past their purgeAt in throttled batches, along with their Cloudinary images.
+Run it daily from cron, off-peak; the purgeAt TTL index removes anything it misses two
+days later. Progress is shown at /metrics/expiry-job.
+
+Usage:
+    python expire_ads.py                                  # 200 per batch, at most 100 ads/s
+    python expire_ads.py --batch-size 500 --rate 250
+    python expire_ads.py --max-batches 10                 # stop after 10 batches
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ad_expiry_job import BATCH_SIZE, DOCS_PER_SECOND, run_ad_expiry
+
+
+async def main(args):
+    print("🚀 Expiring ads...")
+    report = await run_ad_expiry(args.batch_size, args.rate, args.max_batches)
+    print(
+        f"✅ {report['deleted']} ads and {report['images_deleted']}/{report['images']} images deleted "
+        f"in {report['batches']} batches, {report['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired ads in throttled batches")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=DOCS_PER_SECOND, help="maximum ads deleted per second")
+    parser.add_argument("--max-batches", type=int, default=None)
+    asyncio.run(main(parser.parse_args()))
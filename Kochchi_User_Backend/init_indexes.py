@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Database Index Script
+Applies the index registry in databases/indexes.py and reports drift.
+The app applies the same registry on startup; use this to do it ahead of a deploy.
+
+Usage:
+    python init_indexes.py           # create missing indexes, then report drift
+    python init_indexes.py --check   # report drift only (exit code 1 if any)
+"""
+
+import asyncio
+import sys
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from databases.indexes import INDEXES, apply_indexes, index_drift, print_drift
+
+
+async def main(check_only: bool):
+    if not check_only:
+        print("🚀 Applying indexes...")
+        created = await apply_indexes()
+        for collection_name in INDEXES:
+            print(f"📊 {collection_name}: {len(created.get(collection_name, []))} indexes ensured")
+
+    drift = await index_drift()
+    print_drift(drift)
+    if check_only and drift:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main("--check" in sys.argv[1:]))
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 import uvicorn
 from databases.mongo import ensure_collections_exist
+from databases.indexes import apply_indexes, index_drift, print_drift
 from routes.ads_routes import ads_router
 from routes.auth_routes import auth_router
 from routes.blog_routes import blog_router
@@ -13,20 +14,26 @@ from routes.category_routes import category_router
 from routes.competition_routes import competition_router
 from routes.dansal_routes import dansal_router
 from routes.discount_router import discount_router
+from routes.feed_routes import feed_router
+from routes.metrics_routes import metrics_router
 from routes.notification_routes import notification_router
 from routes.payment__routes import payment_router
 from routes.popup_routes import popup_router
 from routes.pricing_routes import pricing_router
 from routes.user_router import user_router
-from services.remove_expired_records import remove_old_non_top_non_carousal_ads, remove_expired_dansals
+from services.expiry_service import start_expiry_watchers
+from services.spatial_index_service import rebuild_spatial_indexes
+from services.suggest_index_service import build_suggest_index
 from utils.auth.jwt_functions import hash_password
+from utils.responses.compression import CompressionMiddleware
+from utils.responses.orjson_response import ORJSONResponse
 from datetime import datetime
 from databases.mongo import db
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(root_path="/api")
+app = FastAPI(root_path="/api", default_response_class=ORJSONResponse)
 
 BASE_URL = os.getenv("BASE_URL", "http://localhost")
 PORT = int(os.getenv("PORT", 8000))
@@ -34,15 +41,9 @@ PORT = int(os.getenv("PORT", 8000))
 async def create_database_indexes():
     """Create database indexes for better performance"""
     try:
-        from databases.mongo import db
-        users_collection = db["users"]
-
-        # Create indexes
-        await users_collection.create_index("username", unique=True, sparse=True)
-        await users_collection.create_index("email", unique=True, sparse=True)
-        await users_collection.create_index("role")
-
+        await apply_indexes()
         print("📊 Database indexes created successfully!")
+        print_drift(await index_drift())
 
     except Exception as e:
         print(f"❌ Error creating indexes: {e}")
@@ -52,19 +53,11 @@ async def startup_event():
     async def check_database():
         await ensure_collections_exist()
         await create_database_indexes()
-        
-    async def periodic_ad_cleanup():
-        while True:
-            await remove_old_non_top_non_carousal_ads()
-            await asyncio.sleep(86400)  # every 24 hours
-
-    async def periodic_dansal_cleanup():
-        while True:
-            await remove_expired_dansals()
-            await asyncio.sleep(21600)  # every 6 hours
-
-    asyncio.create_task(periodic_ad_cleanup())
-    asyncio.create_task(periodic_dansal_cleanup())
+        await rebuild_spatial_indexes()
+        await build_suggest_index()
+
+    # Expired ads and dansals are deleted by TTL indexes; this only cleans up after them
+    start_expiry_watchers()
     asyncio.create_task(check_database())
 
 origins = [
@@ -83,6 +76,9 @@ app.add_middleware(
     # Allow all headers
 )
 
+# gzip/brotli for listing payloads; added last so it wraps CORS and sees the final headers
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(ads_router)
@@ -97,6 +93,8 @@ app.include_router(category_router)
 app.include_router(popup_router)
 app.include_router(notification_router)
 app.include_router(discount_router)
+app.include_router(metrics_router)
+app.include_router(feed_router)
 
 os.makedirs('data_sources', exist_ok=True)
 app.mount("/data_sources", StaticFiles(directory="data_sources"), name="data_sources")
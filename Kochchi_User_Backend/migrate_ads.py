@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Ads Migration Script
+Backfills derived fields on existing ads. Safe to run more than once.
+
+Usage:
+    python migrate_ads.py              # run every step
+    python migrate_ads.py geo_points   # run selected steps only
+"""
+
+import asyncio
+import sys
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+# Load environment variables
+load_dotenv()
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from databases.mongo import db
+from services.geo_service import build_geo_point
+from services.ad_keys_service import ad_search_keys
+from services.reaction_service import ad_reactions_collection, VOTE, RECOMMEND
+from utils.ads.ad_expiry import compute_purge_at
+from utils.ads.ad_priority import compute_priority_score
+from utils.ads.ad_schedule import open_intervals
+
+BATCH_SIZE = 500
+
+ads_collection = db["ads"]
+
+
+async def flush(collection, operations: list) -> int:
+    if not operations:
+        return 0
+    result = await collection.bulk_write(operations, ordered=False)
+    operations.clear()
+    return result.modified_count
+
+
+async def backfill_geo_points():
+    """Write location.point (GeoJSON) for ads that don't have one yet"""
+    updated = 0
+    skipped = 0
+    operations = []
+
+    cursor = ads_collection.find(
+        {"location.point": {"$exists": False}},
+        {"location": 1}
+    ).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        point = build_geo_point(ad.get("location"))
+        if not point:
+            skipped += 1
+            continue
+        operations.append(UpdateOne({"_id": ad["_id"]}, {"$set": {"location.point": point}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += await flush(ads_collection, operations)
+
+    updated += await flush(ads_collection, operations)
+    print(f"📍 Geo points: {updated} ads updated, {skipped} ads without usable coordinates.")
+
+
+async def move_reactions_to_store():
+    """
+    Move embedded reaction arrays (reactions.*.userIds, recommendations.userIds) into
+    the ad_reactions collection, recount the ad counters from it and drop the arrays.
+    """
+    moved_ads = 0
+    cursor = ads_collection.find(
+        {"$or": [
+            {"reactions.likes.userIds": {"$exists": True}},
+            {"reactions.unlikes.userIds": {"$exists": True}},
+            {"recommendations.userIds": {"$exists": True}},
+        ]},
+        {"reactions": 1, "recommendations": 1}
+    ).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        ad_id = ad["_id"]
+        reactions = ad.get("reactions") or {}
+        likes = set((reactions.get("likes") or {}).get("userIds") or [])
+        unlikes = set((reactions.get("unlikes") or {}).get("userIds") or []) - likes
+        recommends = set((ad.get("recommendations") or {}).get("userIds") or [])
+        now = datetime.utcnow()
+
+        operations = []
+        for value, user_ids in (("like", likes), ("unlike", unlikes)):
+            for user_id in user_ids:
+                operations.append(UpdateOne(
+                    {"adId": ad_id, "userId": user_id, "kind": VOTE},
+                    {"$setOnInsert": {"value": value, "updatedAt": now}},
+                    upsert=True
+                ))
+        for user_id in recommends:
+            operations.append(UpdateOne(
+                {"adId": ad_id, "userId": user_id, "kind": RECOMMEND},
+                {"$setOnInsert": {"updatedAt": now}},
+                upsert=True
+            ))
+        if operations:
+            await ad_reactions_collection.bulk_write(operations, ordered=False)
+
+        # Recount from the store so reactions made through the new endpoints are kept
+        counts = {
+            "reactions.likes.count": await ad_reactions_collection.count_documents(
+                {"adId": ad_id, "kind": VOTE, "value": "like"}),
+            "reactions.unlikes.count": await ad_reactions_collection.count_documents(
+                {"adId": ad_id, "kind": VOTE, "value": "unlike"}),
+            "recommendations.count": await ad_reactions_collection.count_documents(
+                {"adId": ad_id, "kind": RECOMMEND}),
+        }
+        await ads_collection.update_one(
+            {"_id": ad_id},
+            {
+                "$set": counts,
+                "$unset": {
+                    "reactions.likes.userIds": "",
+                    "reactions.unlikes.userIds": "",
+                    "recommendations.userIds": "",
+                },
+            }
+        )
+        moved_ads += 1
+
+    print(f"👍 Reactions: moved embedded reactions of {moved_ads} ads into ad_reactions.")
+
+
+async def backfill_priority_scores():
+    """Recompute the stored priority_score of every ad"""
+    updated = 0
+    operations = []
+
+    cursor = ads_collection.find({}, {"business": 1, "priority_score": 1}).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        score = compute_priority_score(ad)
+        if ad.get("priority_score") == score:
+            continue
+        operations.append(UpdateOne({"_id": ad["_id"]}, {"$set": {"priority_score": score}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += await flush(ads_collection, operations)
+
+    updated += await flush(ads_collection, operations)
+    print(f"⭐ Priority scores: {updated} ads updated.")
+
+
+async def backfill_search_keys():
+    """Recompute the normalized categoryKey/cityKey filter fields of every ad"""
+    updated = 0
+    operations = []
+
+    cursor = ads_collection.find(
+        {}, {"business.category": 1, "location.city": 1, "categoryKey": 1, "cityKey": 1}
+    ).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        keys = await ad_search_keys(ad)
+        if all(ad.get(field) == value for field, value in keys.items()):
+            continue
+        operations.append(UpdateOne({"_id": ad["_id"]}, {"$set": keys}))
+        if len(operations) >= BATCH_SIZE:
+            updated += await flush(ads_collection, operations)
+
+    updated += await flush(ads_collection, operations)
+    print(f"🔑 Search keys: {updated} ads updated.")
+
+
+async def backfill_open_intervals():
+    """Parse every ad's schedule into the openIntervals used by open_now / open_at"""
+    updated = 0
+    operations = []
+
+    cursor = ads_collection.find({}, {"schedule": 1, "openIntervals": 1}).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        intervals = open_intervals(ad.get("schedule"))
+        if ad.get("openIntervals") == intervals:
+            continue
+        operations.append(UpdateOne({"_id": ad["_id"]}, {"$set": {"openIntervals": intervals}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += await flush(ads_collection, operations)
+
+    updated += await flush(ads_collection, operations)
+    print(f"🕒 Open intervals: {updated} ads updated.")
+
+
+async def backfill_purge_at():
+    """Compute purgeAt, the TTL expiry of non-top, non-carousel ads (ads past it are deleted by MongoDB)"""
+    updated = 0
+    operations = []
+
+    cursor = ads_collection.find({}, {"adSettings": 1, "createdAt": 1, "purgeAt": 1}).batch_size(BATCH_SIZE)
+
+    async for ad in cursor:
+        purge_at = compute_purge_at(ad)
+        if "purgeAt" in ad and ad["purgeAt"] == purge_at:
+            continue
+        operations.append(UpdateOne({"_id": ad["_id"]}, {"$set": {"purgeAt": purge_at}}))
+        if len(operations) >= BATCH_SIZE:
+            updated += await flush(ads_collection, operations)
+
+    updated += await flush(ads_collection, operations)
+    print(f"⏳ Purge dates: {updated} ads updated.")
+
+
+MIGRATIONS = {
+    "geo_points": backfill_geo_points,
+    "reactions": move_reactions_to_store,
+    "priority_scores": backfill_priority_scores,
+    "search_keys": backfill_search_keys,
+    "open_intervals": backfill_open_intervals,
+    "purge_at": backfill_purge_at,
+}
+
+
+async def main(selected):
+    print("🚀 Migrating ads...")
+    for name in selected:
+        if name not in MIGRATIONS:
+            print(f"❌ Unknown migration: {name} (available: {', '.join(MIGRATIONS)})")
+            sys.exit(1)
+    for name in selected:
+        await MIGRATIONS[name]()
+    print("✅ Migration complete!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or list(MIGRATIONS)))
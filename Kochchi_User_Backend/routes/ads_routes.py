@@ -6,11 +6,11 @@ import cloudinary.uploader
 import requests
 from dotenv import load_dotenv
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends, Query, Body
-from typing import List, Optional, Annotated, Dict, Any
+from typing import List, Optional, Annotated, Dict, Any, Union
 from bson import ObjectId
 from datetime import datetime
 import re
-from pydantic import ValidationError, HttpUrl
+from pydantic import ValidationError
 
 from databases.mongo import db
 from data_models.ads_model import (
@@ -18,7 +18,8 @@ from data_models.ads_model import (
     AdDeleteResponse,
     AdApprovalResponse,
     ErrorResponse, TopAdPreview, AdListingPreview, AdOut, PaginatedAdResponse, AdBase, AdCreateSchema,
-    ApprovedAdPreview, ApprovedAdListResponse, AdListResponse, SimplifiedAdPreview, AdUpdateResponse, AdUpdateSchema
+    ApprovedAdPreview, ApprovedAdListResponse, AdListResponse, SimplifiedAdPreview, AdUpdateResponse, AdUpdateSchema,
+    SimplifiedAdPreviewPage
 )
 from fastapi import Query, Depends, HTTPException
 from typing import List
@@ -31,36 +32,35 @@ from bson import ObjectId
 
 from routes.payment__routes import initiate_payment, create_stripe_checkout_session
 from routes.pricing_routes import get_all_prices
-from services.distance_radius_calculator import calculate_distance
 from services.file_upload_service import save_uploaded_images, upload_image_to_cloudinary
+from services.reaction_service import toggle_vote, add_recommendation, get_user_reactions, delete_ad_reactions
+from services.ad_facets_service import facet_counts
+from services.ad_export_service import EXPORT_BATCH_SIZE, stream_csv, stream_ndjson
+from services.ad_cache_service import AD_SETS, TOP_PAGE_SIZE, fetch_ads_by_ids, invalidate_ad_sets, new_shuffle_seed, shuffled_ad_set_ids
+from services.home_feed_service import invalidate_home_feed
+from services.ad_keys_service import ad_search_keys, category_key, city_key
+from services.ad_sampler_service import CAROUSEL_QUERY, CAROUSEL_SIZE, sample_ads
+from services.spatial_index_service import MAX_RADIUS_KM, drop_ad_location, nearby_ad_ids, refresh_ad_location
+from services.suggest_index_service import (
+    DEFAULT_SUGGEST_LIMIT, SUGGEST_KINDS, drop_ad_suggestions, refresh_ad_suggestions, suggest, update_ad_popularity
+)
+from services.geo_service import (
+    GEO_POINT_FIELD, NEAREST_FIRST, distance_expression, geo_near_all, geo_near_page, with_geo_point
+)
 from fastapi.security import OAuth2PasswordBearer
 from utils.auth.jwt_functions import decode_token, get_admin_or_super, get_current_user
 from datetime import timedelta
+from utils.ads.ad_fields import FIELD_PROFILES, is_inclusion, resolve_projection
+from utils.ads.ad_flatten import flat_project_stage, flattener
+from utils.ads.ad_priority import PRIORITY_DESC, compute_priority_score
+from utils.ads.ad_expiry import compute_purge_at
+from utils.ads.ad_schedule import open_at_query, open_intervals
 from utils.examples.ads import example_json, ads_description
+from utils.pagination.cursor_pagination import (
+    CREATED_DESC, MAX_PAGE_SIZE, decode_cursor, find_page, is_paginated, keyset_filter, page_size, page_response,
+    split_page
+)
 from bson import ObjectId
-# Convert all HttpUrl, datetime, etc. to JSON-serializable values
-def convert_to_serializable(obj):
-    if isinstance(obj, (datetime,)):
-        return obj
-    if isinstance(obj, HttpUrl):
-        return str(obj)
-    if isinstance(obj, dict):
-        return {k: convert_to_serializable(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [convert_to_serializable(i) for i in obj]
-    return obj
-
-def extract_lat_lon_from_string(location_str: Optional[str]):
-    """
-    Extracts lat, lon from a coordinate string like '6.9271,79.8612' or a full map URL.
-    """
-    if not location_str:
-        return None, None
-    match = re.search(r'([-+]?[0-9]*\.?[0-9]+)[,\s]+([-+]?[0-9]*\.?[0-9]+)', location_str)
-    if match:
-        return float(match.group(1)), float(match.group(2))
-    return None, None
-
 ads_router = APIRouter(prefix="/ads", tags=["Ads"])
 
 ads_collection = db["ads"]
@@ -78,7 +78,42 @@ webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
 
 
 from pymongo.errors import ServerSelectionTimeoutError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from utils.responses.orjson_response import ORJSONResponse
+from utils.responses.conditional import DETAIL_MAX_AGE_SECONDS, cache_headers, etag_matches, make_etag
+
+async def visible_ads_query(
+        category: Optional[str],
+        specialty: Optional[str],
+        city: Optional[str],
+        match: str = "exact"
+) -> Dict[str, Any]:
+    """
+    Public listing filter shared by /ads/filter and /ads/search.
+    "exact" matches the normalized, indexed categoryKey/cityKey; "regex" keeps the old
+    case-insensitive substring match on business.category and exact location.city.
+    """
+    query = {
+        "visibility": "visible",
+        "approval.status": "approved"
+    }
+
+    if specialty:
+        query["business.specialty"] = specialty
+
+    if match == "regex":
+        if category and category.lower() != "all categories":
+            query["business.category"] = {"$regex": re.escape(category), "$options": "i"}
+        if city:
+            query["location.city"] = city
+        return query
+
+    if category and category.lower() != "all categories":
+        query["categoryKey"] = await category_key(category)
+    if city:
+        query["cityKey"] = city_key(city)
+    return query
+
 
 @ads_router.get("/filter")
 async def filter_ads(
@@ -86,128 +121,169 @@ async def filter_ads(
         specialty: Optional[str] = Query(None, description="Optional filter by specialty"),
         city: Optional[str] = Query(None, description="Optional filter by city"),
         lat: Optional[float] = Query(None, description="Latitude for distance-based sorting"),
-        lng: Optional[float] = Query(None, description="Longitude for distance-based sorting")
+        lng: Optional[float] = Query(None, description="Longitude for distance-based sorting"),
+        max_distance_km: Optional[float] = Query(None, gt=0, description="Optional search radius in kilometers (requires lat/lng)"),
+        match: str = Query("exact", pattern="^(exact|regex)$", description="exact: normalized category/city keys (indexed); regex: legacy substring match"),
+        open_now: bool = Query(False, description="Only ads open right now (Sri Lanka time)"),
+        open_at: Optional[datetime] = Query(None, description="Only ads open at this time; without a timezone it is taken as Sri Lanka time"),
+        after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+        fields: Optional[str] = Query(None, description=f"Profile ({', '.join(FIELD_PROFILES)}) or comma-separated fields; defaults to card"),
+        flatten: str = Query("app", pattern="^(app|db)$", description="db: Mongo builds the flattened items ($project); unpaginated listings only")
 ):
-    query = {
-        "visibility": "visible",
-        "approval.status": "approved"
-    }
+    projection = resolve_projection(fields, "card")
+    query = await visible_ads_query(category, specialty, city, match)
+    if open_at or open_now:
+        # Matched against the precomputed openIntervals; no schedule strings are parsed here
+        query.update(open_at_query(open_at))
 
-    if category and category.lower() != "all categories":
-        query["business.category"] = {"$regex": category, "$options": "i"}
-    if specialty:
-        query["business.specialty"] = specialty
-    if city:
-        query["location.city"] = city
+    near_me = lat is not None and lng is not None
+    paginated = is_paginated(after, limit)
+    next_cursor = None
+    db_flattened = flatten == "db" and not (paginated or near_me)
 
     try:
-        ads_cursor = ads_collection.find(query)
-        ads = await ads_cursor.to_list(length=None)
+        if paginated and near_me:
+            ads, next_cursor = await geo_near_page(
+                ads_collection, lat, lng, query, after, page_size(limit), max_distance_km, projection
+            )
+        elif paginated:
+            ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit), projection)
+        elif near_me:
+            # Sorted by distance (km)
+            ads = await geo_near_all(ads_collection, lat, lng, query, max_distance_km, projection)
+        elif db_flattened:
+            ads = await ads_collection.aggregate([
+                {"$match": query}, flat_project_stage(projection, {"priority_score": {"$literal": 100}})
+            ]).to_list(length=None)
+        else:
+            ads = await ads_collection.find(query, projection).to_list(length=None)
     except ServerSelectionTimeoutError as e:
         return JSONResponse(
             status_code=503,
             content={"error": "Database connection failed. Please try again later.", "details": str(e)}
         )
 
+    if db_flattened:
+        return ORJSONResponse(ads)
+
+    flatten_ad = flattener(projection)
     results = []
     for ad in ads:
-        contact = ad.get("contact", {})
-        location = ad.get("location", {})
-        business = ad.get("business", {})
-        schedule = ad.get("schedule", {})
-        adSettings = ad.get("adSettings", {})
-        approval = ad.get("approval", {})
-        reactions = ad.get("reactions", {})
-        recommendations = ad.get("recommendations", {})
-
-        ad_lat = location.get("lat")
-        ad_lng = location.get("lon")
-        if (ad_lat is None or ad_lng is None) and location.get("googleMapLocation"):
-            ad_lat, ad_lng = extract_lat_lon_from_string(location["googleMapLocation"])
-
-        if lat is not None and lng is not None:
-            if ad_lat is None or ad_lng is None:
-                continue
-            distance = calculate_distance(lat, lng, ad_lat, ad_lng)
-        else:
-            distance = 0
+        item = flatten_ad(ad)
+        item["priority_score"] = int(100 - (ad.get("distance", 0) if near_me else 0))
+        results.append(item)
 
-        # Return raw dictionary instead of Pydantic model to bypass all validations
-        results.append({
-            "ad_id": str(ad["_id"]),
-            "title": ad.get("shopName", "Untitled Ad"),
-            "image_url": ad.get("images", [None])[0] if ad.get("images") else None,
-            "priority_score": int(100 - distance),
-            "shopName": ad.get("shopName", ""),
-
-            # Contact
-            "contact_address": contact.get("address", ""),
-            "contact_phone": contact.get("phone", ""),
-            "contact_whatsapp": contact.get("whatsapp"),
-            "contact_email": contact.get("email"),
-            "contact_website": contact.get("website"),
-
-            # Location
-            "location_googleMapLocation": location.get("googleMapLocation"),
-            "location_city": location.get("city", ""),
-            "location_district": location.get("district", ""),
-            "location_province": location.get("province"),
-            "location_country": location.get("country", "Sri Lanka"),
-            "location_state": location.get("state"),
-
-            # Business
-            "business_category": business.get("category", ""),
-            "business_specialty": business.get("specialty"),
-            "business_tags": business.get("tags", []),
-            "business_halalAvailable": business.get("halalAvailable", False),
-            "business_description": business.get("description"),
-            "business_menuOptions": business.get("menuOptions", []),
-
-            # Schedule
-            "schedule_mon": schedule.get("mon", []),
-            "schedule_tue": schedule.get("tue", []),
-            "schedule_wed": schedule.get("wed", []),
-            "schedule_thu": schedule.get("thu", []),
-            "schedule_fri": schedule.get("fri", []),
-            "schedule_sat": schedule.get("sat", []),
-            "schedule_sun": schedule.get("sun", []),
-
-            # AdSettings
-            "isTopAd": adSettings.get("isTopAd", False),
-            "isCarousalAd": adSettings.get("isCarousalAd", False),
-            "hasHalal": adSettings.get("hasHalal", False),
-
-            # Media
-            "images": ad.get("images", []),
-            "videoUrl": ad.get("videoUrl"),
-
-            # Approval
-            "approval_status": approval.get("status", ""),
-            "approval_adminId": approval.get("adminId"),
-            "approval_adminComment": approval.get("adminComment"),
-            "approval_approvedAt": approval.get("approvedAt"),
-
-            # Reactions
-            "likes_count": reactions.get("likes", {}).get("count", 0),
-            "likes_userIds": reactions.get("likes", {}).get("userIds", []),
-            "unlikes_count": reactions.get("unlikes", {}).get("count", 0),
-            "unlikes_userIds": reactions.get("unlikes", {}).get("userIds", []),
-
-            # Recommendations
-            "recommendations_count": recommendations.get("count", 0),
-            "recommendations_userIds": recommendations.get("userIds", []),
-
-            "visibility": ad.get("visibility", ""),
-            "expiryDate": ad.get("expiryDate"),
-            "createdAt": ad.get("createdAt"),
-            "updatedAt": ad.get("updatedAt")
-        })
+    if paginated:
+        return ORJSONResponse(page_response(results, next_cursor))
+    return ORJSONResponse(results)
+
+
+
+SEARCH_SORTS = {
+    "relevance": [("score", -1), ("_id", 1)],
+    "distance": NEAREST_FIRST,
+}
+
+
+@ads_router.get(
+    "/facets",
+    summary="Ad counts per category, city, district and halal",
+    description="Counts for the browse sidebar, from one $facet aggregation. Each facet applies the other "
+                "current filters but not its own. Cached per filter for a minute.",
+    status_code=status.HTTP_200_OK
+)
+async def get_ad_facets(
+        category: Optional[str] = Query(None, description="Current category filter"),
+        specialty: Optional[str] = Query(None, description="Current specialty filter"),
+        city: Optional[str] = Query(None, description="Current city filter")
+):
+    query = await visible_ads_query(category, specialty, city)
+    return ORJSONResponse(await facet_counts(query))
+
+
+@ads_router.get(
+    "/suggest",
+    summary="Autocomplete for the search box",
+    description="Shop names, cities, districts and categories with a word starting with `prefix`, "
+                "most liked/recommended first. Served from an in-memory index.",
+    status_code=status.HTTP_200_OK
+)
+async def suggest_ads(
+        prefix: str = Query(..., min_length=1, max_length=60, description="What the user has typed so far"),
+        kind: Optional[str] = Query(None, pattern=f"^({'|'.join(SUGGEST_KINDS)})$", description="Only suggest this kind"),
+        limit: int = Query(DEFAULT_SUGGEST_LIMIT, ge=1, le=20, description="Number of suggestions")
+):
+    return ORJSONResponse(await suggest(prefix, limit, kind))
+
+
+@ads_router.get(
+    "/search",
+    summary="Full-text search over ads",
+    description="Relevance-ranked search over shop name, description, tags, specialty and city. "
+                "Combine with category/specialty/city filters, and pass lat/lng to get (or sort by) distance.",
+    responses={400: {"model": ErrorResponse}},
+    status_code=status.HTTP_200_OK
+)
+async def search_ads(
+        q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+        category: Optional[str] = Query(None, description="Filter by main category"),
+        specialty: Optional[str] = Query(None, description="Optional filter by specialty"),
+        city: Optional[str] = Query(None, description="Optional filter by city"),
+        lat: Optional[float] = Query(None, description="Latitude, adds distance_km to results"),
+        lng: Optional[float] = Query(None, description="Longitude, adds distance_km to results"),
+        sort: str = Query("relevance", pattern="^(relevance|distance)$", description="relevance or distance"),
+        match: str = Query("exact", pattern="^(exact|regex)$", description="exact: normalized category/city keys (indexed); regex: legacy substring match"),
+        after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        fields: Optional[str] = Query(None, description=f"Profile ({', '.join(FIELD_PROFILES)}) or comma-separated fields; defaults to card")
+):
+    near_me = lat is not None and lng is not None
+    if sort == "distance" and not near_me:
+        raise HTTPException(status_code=400, detail="Sorting by distance requires lat and lng")
+
+    size = page_size(limit)
+    order = SEARCH_SORTS[sort]
+    projection = resolve_projection(fields, "card")
+
+    # $text must be in the first $match; it uses the weighted ads text index
+    text_match = {"$text": {"$search": q}, **(await visible_ads_query(category, specialty, city, match))}
+    if sort == "distance":
+        text_match[GEO_POINT_FIELD] = {"$exists": True}
+
+    computed = {"score": {"$meta": "textScore"}}
+    if near_me:
+        computed["distance"] = distance_expression(lat, lng)
+
+    pipeline = [{"$match": text_match}, {"$addFields": computed}]
+    if after:
+        pipeline.append({"$match": keyset_filter(order, decode_cursor(after, order))})
+    pipeline += [
+        {"$sort": dict(order)},
+        {"$limit": size + 1},
+    ]
+    if is_inclusion(projection):
+        projection = {**projection, **{field: 1 for field in computed}}
+    pipeline.append({"$project": projection})
 
-    if lat is not None and lng is not None:
-        results.sort(key=lambda x: -x['priority_score'])
+    try:
+        ads = await ads_collection.aggregate(pipeline).to_list(length=size + 1)
+    except ServerSelectionTimeoutError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Database connection failed. Please try again later.", "details": str(e)}
+        )
 
-    return results
+    ads, next_cursor = split_page(ads, size, order)
 
+    results = []
+    for ad in ads:
+        ad["ad_id"] = str(ad["_id"])
+        if near_me and ad.get("distance") is not None:
+            ad["distance_km"] = round(ad.pop("distance"), 3)
+        results.append(ad)
+
+    return ORJSONResponse(page_response(results, next_cursor))
 
 
 @ads_router.post(
@@ -248,15 +324,20 @@ async def create_ad(
         expiry = now + timedelta(days=31)
 
         ad_data.update({
+            "location": with_geo_point(ad_data.get("location")),
             "userId": current_user["user_id"],
             "approval": {"status": "pending", "adminId": None, "adminComment": None, "approvedAt": None},
-            "reactions": {"likes": {"count": 0, "userIds": []}, "unlikes": {"count": 0, "userIds": []}},
-            "recommendations": {"count": 0, "userIds": []},
+            "reactions": {"likes": {"count": 0}, "unlikes": {"count": 0}},
+            "recommendations": {"count": 0},
             "visibility": "hidden",
             "createdAt": now,
             "updatedAt": now,
             "expiryDate": expiry
         })
+        ad_data["priority_score"] = compute_priority_score(ad_data)
+        ad_data.update(await ad_search_keys(ad_data))
+        ad_data["openIntervals"] = open_intervals(ad_data.get("schedule"))
+        ad_data["purgeAt"] = compute_purge_at(ad_data)
         business = ad_data.get("business", {})
         business_category = business.get("category", "")
         # Fetch all Stripe prices using your method
@@ -296,7 +377,6 @@ async def create_ad(
             raise HTTPException(status_code=400, detail="No matching Stripe prices found for ad settings.")
 
         # 1️⃣ Insert ad
-        ad_data = convert_to_serializable(ad_data)
         result = await ads_collection.insert_one(ad_data)
         ad_id = str(result.inserted_id)
 
@@ -360,53 +440,46 @@ async def create_ad(
         raise HTTPException(status_code=500, detail=f"Creation failed: {str(e)}")
 
 @ads_router.get("/carousal-ads")
-async def get_carousal_ads():
-    cursor = ads_collection.find({
-        "adSettings.isCarousalAd": True,
-        "visibility": "visible"
-    })
-
-    ads = await cursor.to_list(length=None)
+async def get_carousal_ads(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination (latest first)"),
+    weight: Optional[str] = Query(None, pattern="^(plan|recency)$", description="Favour top-plan or recent ads in the random pick")
+):
+    query = CAROUSEL_QUERY
 
-    if not ads:
-        raise HTTPException(status_code=404, detail="No carousal ads found")
+    if is_paginated(after, limit):
+        ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit))
+        return ORJSONResponse(page_response(ads, next_cursor))
 
-    random.shuffle(ads)
-    selected = ads[:8]
-    result = []
+    # Random 8 picked by Mongo; only those 8 documents are read
+    selected = await sample_ads(query, CAROUSEL_SIZE, weight)
 
-    for ad in selected:
-        try:
-            ad["_id"] = str(ad["_id"])  # Convert ObjectId to string
-            result.append(ad)
-        except Exception as e:
-            print(f"Error processing ad {ad.get('_id')}: {e}")
-            continue
+    if not selected:
+        raise HTTPException(status_code=404, detail="No carousal ads found")
 
-    return result
+    return ORJSONResponse(selected)
 
 @ads_router.get("/pending")
-async def get_pending_ads():
-    cursor = ads_collection.find({
+async def get_pending_ads(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination")
+):
+    query = {
         "approval.status": "pending"
-    })
+    }
+
+    if is_paginated(after, limit):
+        ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit))
+        return ORJSONResponse(page_response(ads, next_cursor))
+
+    cursor = ads_collection.find(query)
 
     ads = await cursor.to_list(length=None)
 
     if not ads:
         raise HTTPException(status_code=404, detail="No carousal ads found")
 
-    result = []
-
-    for ad in ads:
-        try:
-            ad["_id"] = str(ad["_id"])  # Convert ObjectId to string
-            result.append(ad)
-        except Exception as e:
-            print(f"Error processing ad {ad.get('_id')}: {e}")
-            continue
-
-    return result
+    return ORJSONResponse(ads)
 @ads_router.get(
     "/approve",
     summary="Get all approved ads",
@@ -418,95 +491,34 @@ async def get_pending_ads():
     },
     status_code=status.HTTP_200_OK
 )
-async def get_approved_ads():
+async def get_approved_ads(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    fields: Optional[str] = Query(None, description=f"Profile ({', '.join(FIELD_PROFILES)}) or comma-separated fields; defaults to admin"),
+    flatten: str = Query("app", pattern="^(app|db)$", description="db: Mongo builds the flattened items ($project); unpaginated listings only")
+):
+    projection = resolve_projection(fields, "admin")
     try:
-        ads = await ads_collection.find({"approval.status": "approved"}).to_list(length=None)
-        results = []
-        for ad in ads:
-            contact = ad.get("contact", {})
-            location = ad.get("location", {})
-            business = ad.get("business", {})
-            schedule = ad.get("schedule", {})
-            adSettings = ad.get("adSettings", {})
-            approval = ad.get("approval", {})
-            reactions = ad.get("reactions", {})
-            recommendations = ad.get("recommendations", {})
-
-            ad_lat = location.get("lat")
-            ad_lng = location.get("lon")
-
-                        # Return raw dictionary instead of Pydantic model to bypass all validations
-            results.append({
-                "ad_id": str(ad["_id"]),
-                "title": ad.get("shopName", "Untitled Ad"),
-                "image_url": ad.get("images", [None])[0] if ad.get("images") else None,
-                "priority_score": 0,
-                "shopName": ad.get("shopName", ""),
-
-                # Contact
-                "contact_address": contact.get("address", ""),
-                "contact_phone": contact.get("phone", ""),
-                "contact_whatsapp": contact.get("whatsapp"),
-                "contact_email": contact.get("email"),
-                "contact_website": contact.get("website"),
-
-                # Location
-                "location_googleMapLocation": location.get("googleMapLocation"),
-                "location_city": location.get("city", ""),
-                "location_district": location.get("district", ""),
-                "location_province": location.get("province"),
-                "location_country": location.get("country", "Sri Lanka"),
-                "location_state": location.get("state"),
-
-                # Business
-                "business_category": business.get("category", ""),
-                "business_specialty": business.get("specialty"),
-                "business_tags": business.get("tags", []),
-                "business_halalAvailable": business.get("halalAvailable", False),
-                "business_description": business.get("description"),
-                "business_menuOptions": business.get("menuOptions", []),
-
-                # Schedule
-                "schedule_mon": schedule.get("mon", []),
-                "schedule_tue": schedule.get("tue", []),
-                "schedule_wed": schedule.get("wed", []),
-                "schedule_thu": schedule.get("thu", []),
-                "schedule_fri": schedule.get("fri", []),
-                "schedule_sat": schedule.get("sat", []),
-                "schedule_sun": schedule.get("sun", []),
-
-                # AdSettings
-                "isTopAd": adSettings.get("isTopAd", False),
-                "isCarousalAd": adSettings.get("isCarousalAd", False),
-                "hasHalal": adSettings.get("hasHalal", False),
-
-                # Media
-                "images": ad.get("images", []),
-                "videoUrl": ad.get("videoUrl"),
-
-                # Approval
-                "approval_status": approval.get("status", ""),
-                "approval_adminId": approval.get("adminId"),
-                "approval_adminComment": approval.get("adminComment"),
-                "approval_approvedAt": approval.get("approvedAt"),
-
-                # Reactions
-                "likes_count": reactions.get("likes", {}).get("count", 0),
-                "likes_userIds": reactions.get("likes", {}).get("userIds", []),
-                "unlikes_count": reactions.get("unlikes", {}).get("count", 0),
-                "unlikes_userIds": reactions.get("unlikes", {}).get("userIds", []),
-
-                # Recommendations
-                "recommendations_count": recommendations.get("count", 0),
-                "recommendations_userIds": recommendations.get("userIds", []),
-
-                "visibility": ad.get("visibility", ""),
-                "expiryDate": ad.get("expiryDate"),
-                "createdAt": ad.get("createdAt"),
-                "updatedAt": ad.get("updatedAt")
-            })
+        query = {"approval.status": "approved"}
+        paginated = is_paginated(after, limit)
+        next_cursor = None
+        if paginated:
+            ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit), projection)
+        elif flatten == "db":
+            return ORJSONResponse(await ads_collection.aggregate([
+                {"$match": query}, flat_project_stage(projection)
+            ]).to_list(length=None))
+        else:
+            ads = await ads_collection.find(query, projection).to_list(length=None)
+
+        flatten_ad = flattener(projection)
+        results = [flatten_ad(ad) for ad in ads]
 
-        return results
+        if paginated:
+            return ORJSONResponse(page_response(results, next_cursor))
+        return ORJSONResponse(results)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve approved ads: {str(e)}")
 
@@ -539,95 +551,32 @@ async def get_my_ads(current_user: dict = Depends(get_current_user)):
     },
     status_code=status.HTTP_200_OK
 )
-async def get_rejected_ads():
+async def get_rejected_ads(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    flatten: str = Query("app", pattern="^(app|db)$", description="db: Mongo builds the flattened items ($project); unpaginated listings only")
+):
     try:
-        ads = await ads_collection.find({"approval.status": "rejected"}).to_list(length=None)
-        results = []
-        for ad in ads:
-            contact = ad.get("contact", {})
-            location = ad.get("location", {})
-            business = ad.get("business", {})
-            schedule = ad.get("schedule", {})
-            adSettings = ad.get("adSettings", {})
-            approval = ad.get("approval", {})
-            reactions = ad.get("reactions", {})
-            recommendations = ad.get("recommendations", {})
-
-            ad_lat = location.get("lat")
-            ad_lng = location.get("lon")
-
-            # Return raw dictionary instead of Pydantic model to bypass all validations
-            results.append({
-                "ad_id": str(ad["_id"]),
-                "title": ad.get("shopName", "Untitled Ad"),
-                "image_url": ad.get("images", [None])[0],
-                "priority_score": 0,
-                "shopName": ad.get("shopName", ""),
-
-                # Contact
-                "contact_address": contact.get("address", ""),
-                "contact_phone": contact.get("phone", ""),
-                "contact_whatsapp": contact.get("whatsapp"),
-                "contact_email": contact.get("email"),
-                "contact_website": contact.get("website"),
-
-                # Location
-                "location_googleMapLocation": location.get("googleMapLocation"),
-                "location_city": location.get("city", ""),
-                "location_district": location.get("district", ""),
-                "location_province": location.get("province"),
-                "location_country": location.get("country", "Sri Lanka"),
-                "location_state": location.get("state"),
-
-                # Business
-                "business_category": business.get("category", ""),
-                "business_specialty": business.get("specialty"),
-                "business_tags": business.get("tags", []),
-                "business_halalAvailable": business.get("halalAvailable", False),
-                "business_description": business.get("description"),
-                "business_menuOptions": business.get("menuOptions", []),
-
-                # Schedule
-                "schedule_mon": schedule.get("mon", []),
-                "schedule_tue": schedule.get("tue", []),
-                "schedule_wed": schedule.get("wed", []),
-                "schedule_thu": schedule.get("thu", []),
-                "schedule_fri": schedule.get("fri", []),
-                "schedule_sat": schedule.get("sat", []),
-                "schedule_sun": schedule.get("sun", []),
-
-                # AdSettings
-                "isTopAd": adSettings.get("isTopAd", False),
-                "isCarousalAd": adSettings.get("isCarousalAd", False),
-                "hasHalal": adSettings.get("hasHalal", False),
-
-                # Media
-                "images": ad.get("images", []),
-                "videoUrl": ad.get("videoUrl"),
-
-                # Approval
-                "approval_status": approval.get("status", ""),
-                "approval_adminId": approval.get("adminId"),
-                "approval_adminComment": approval.get("adminComment"),
-                "approval_approvedAt": approval.get("approvedAt"),
-
-                # Reactions
-                "likes_count": reactions.get("likes", {}).get("count", 0),
-                "likes_userIds": reactions.get("likes", {}).get("userIds", []),
-                "unlikes_count": reactions.get("unlikes", {}).get("count", 0),
-                "unlikes_userIds": reactions.get("unlikes", {}).get("userIds", []),
-
-                # Recommendations
-                "recommendations_count": recommendations.get("count", 0),
-                "recommendations_userIds": recommendations.get("userIds", []),
-
-                "visibility": ad.get("visibility", ""),
-                "expiryDate": ad.get("expiryDate"),
-                "createdAt": ad.get("createdAt"),
-                "updatedAt": ad.get("updatedAt")
-            })
+        query = {"approval.status": "rejected"}
+        paginated = is_paginated(after, limit)
+        next_cursor = None
+        if paginated:
+            ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit))
+        elif flatten == "db":
+            return ORJSONResponse(await ads_collection.aggregate([
+                {"$match": query}, flat_project_stage()
+            ]).to_list(length=None))
+        else:
+            ads = await ads_collection.find(query).to_list(length=None)
 
-        return results
+        flatten_ad = flattener()
+        results = [flatten_ad(ad) for ad in ads]
+
+        if paginated:
+            return ORJSONResponse(page_response(results, next_cursor))
+        return ORJSONResponse(results)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve rejected ads: {str(e)}")
 
@@ -650,130 +599,165 @@ async def get_my_ads(current_user: dict = Depends(get_current_user)):
     return result
 
 
-def convert_object_ids(doc):
-    if isinstance(doc, list):
-        return [convert_object_ids(item) for item in doc]
-    elif isinstance(doc, dict):
-        new_doc = {}
-        for k, v in doc.items():
-            if isinstance(v, ObjectId):
-                new_doc[k] = str(v)
-            elif isinstance(v, (dict, list)):
-                new_doc[k] = convert_object_ids(v)
-            else:
-                new_doc[k] = v
-        return new_doc
-    else:
-        return doc
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+    "csv": ("text/csv; charset=utf-8", stream_csv),
+}
 
 
+@ads_router.get(
+    "/export",
+    summary="Stream ads for reporting (admin)",
+    description="Streams flattened ads as NDJSON or CSV straight from a Mongo cursor, newest first. "
+                "Memory use doesn't grow with the number of ads.",
+    responses={401: {"model": ErrorResponse}, 403: {"model": ErrorResponse}},
+    status_code=status.HTTP_200_OK
+)
+async def export_ads(
+    status_filter: str = Query("all", alias="status", pattern="^(all|pending|approved|rejected)$", description="Approval status to export"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    fields: Optional[str] = Query(None, description=f"Profile ({', '.join(FIELD_PROFILES)}) or comma-separated fields; defaults to admin"),
+    current_user: dict = Depends(get_admin_or_super)
+):
+    projection = resolve_projection(fields, "admin")
+    query = {} if status_filter == "all" else {"approval.status": status_filter}
+
+    # Walks the (approval.status, createdAt, _id) index, or (createdAt, _id) for status=all,
+    # instead of sorting in memory
+    cursor = ads_collection.find(query, projection).sort(CREATED_DESC).batch_size(EXPORT_BATCH_SIZE)
+
+    media_type, stream = EXPORT_FORMATS[format]
+    filename = f"ads-{status_filter}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream(cursor, projection),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 
 @ads_router.get("/top-full-ads")
 async def get_full_top_ads(
-    page: int = Query(1, ge=1)
+    page: int = Query(1, ge=1),
+    seed: Optional[int] = Query(None, ge=1, description="Shuffle seed from page 1's response; keeps the order stable across pages"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination (latest first)")
 ):
-    PAGE_SIZE = 24
-
-    # 🔍 Fetch top ads only (visible)
-    ads_cursor = ads_collection.find({"adSettings.isTopAd": True, "visibility": "visible"})
-    all_ads = await ads_cursor.to_list(length=None)
-
-    if not all_ads:
+    PAGE_SIZE = TOP_PAGE_SIZE
+    query = AD_SETS["top"]
+
+    if is_paginated(after, limit):
+        page_ads, next_cursor = await find_page(ads_collection, query, CREATED_DESC, after, page_size(limit))
+        for ad in page_ads:
+            ad["ad_id"] = str(ad["_id"])
+        return ORJSONResponse(page_response(page_ads, next_cursor))
+
+    # 🔍 Top ad ids (visible) in this client's shuffled order, cached
+    if seed is None:
+        seed = new_shuffle_seed()
+    top_ids = await shuffled_ad_set_ids("top", seed)
+    total_ads = len(top_ids)
+
+    if not total_ads:
         raise HTTPException(status_code=404, detail="No top ads found")
 
-    # 🔀 Shuffle for random ordering every time
-    random.shuffle(all_ads)
-
-    total_ads = len(all_ads)
     total_pages = (total_ads + PAGE_SIZE - 1) // PAGE_SIZE
 
     if page > total_pages:
         raise HTTPException(status_code=400, detail=f"Page {page} exceeds total pages {total_pages}")
 
-    # ⏬ Paginate
+    # 🔀 This page's slice of the permutation; one $in for its documents
     start = (page - 1) * PAGE_SIZE
-    end = start + PAGE_SIZE
-    page_ads = all_ads[start:end]
+    page_ads = await fetch_ads_by_ids(top_ids[start:start + PAGE_SIZE])
 
     # 🔁 Format each ad
-    results = []
     for ad in page_ads:
         ad["ad_id"] = str(ad["_id"])
-        results.append(convert_object_ids(ad))
 
-    return {
+    return ORJSONResponse({
         "page": page,
+        "seed": seed,
         "total_pages": total_pages,
         "total_ads": total_ads,
-        "results": results
-    }
-
-@ads_router.get("/sorted-all", response_model=List[SimplifiedAdPreview])
-async def get_all_ads_sorted_by_priority():
-    all_ads = []
+        "results": page_ads
+    })
 
-    async for ad in ads_collection.find({"visibility": "visible"}):
-        score = 0
+@ads_router.get("/sorted-all", response_model=Union[List[SimplifiedAdPreview], SimplifiedAdPreviewPage])
+async def get_all_ads_sorted_by_priority(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination")
+):
+    # priority_score is maintained on write, so this is an indexed (visibility, priority_score, _id) walk
+    query = {"visibility": "visible"}
+    projection = {
+        "business.title": 1, "images": {"$slice": 1}, "location.city": 1, "location.district": 1,
+        "category": 1, "contact.name": 1, "contact.phone": 1, "priority_score": 1,
+    }
 
-        # Prioritize night-time / PM businesses
-        open_time = ad.get("business", {}).get("openTime", "").lower()
-        if "pm" in open_time or "night" in open_time:
-            score += 1
+    paginated = is_paginated(after, limit)
+    next_cursor = None
+    if paginated:
+        ads, next_cursor = await find_page(ads_collection, query, PRIORITY_DESC, after, page_size(limit), projection)
+    else:
+        ads = await ads_collection.find(query, projection).sort(PRIORITY_DESC).to_list(length=None)
 
-        ad_data = SimplifiedAdPreview(
+    all_ads = [
+        SimplifiedAdPreview(
             ad_id=str(ad["_id"]),
             title=ad.get("business", {}).get("title", "Untitled Ad"),
-            image_url=ad.get("images", [None])[0],
+            image_url=(ad.get("images") or [None])[0],
             city=ad.get("location", {}).get("city"),
             district=ad.get("location", {}).get("district"),
             category=ad.get("category"),
             contact_name=ad.get("contact", {}).get("name"),
             contact_phone=ad.get("contact", {}).get("phone"),
-            priority_score=score
+            priority_score=ad.get("priority_score", 0)
         )
+        for ad in ads
+    ]
 
-        all_ads.append(ad_data)
+    if paginated:
+        return page_response(all_ads, next_cursor)
 
     if not all_ads:
         raise HTTPException(status_code=404, detail="No ads found")
 
-    # Sort by score descending
-    all_ads.sort(key=lambda x: x.priority_score, reverse=True)
-
     return all_ads
+
 @ads_router.get("/restaurants-nearby")
 async def find_nearby_restaurants(
     lat: float = Query(..., description="Your latitude"),
     lng: float = Query(..., description="Your longitude"),
-    max_distance_km: float = Query(10.0, description="Search radius in kilometers")
+    max_distance_km: float = Query(10.0, gt=0, le=MAX_RADIUS_KM, description="Search radius in kilometers")
 ):
     nearby_ads = []
 
-    async for ad in ads_collection.find({"category": "Restaurants", "visibility": "visible"}):
-        location = ad.get("location", {})
-        ad_lat = location.get("lat")
-        ad_lng = location.get("lng")
+    # Grid index lookup: only ads in the cells around (lat, lng) are scored
+    hits = await nearby_ad_ids(lat, lng, max_distance_km, category="Restaurants")
+    distances = dict(hits)
+    ads = await fetch_ads_by_ids([ad_id for ad_id, _ in hits])
 
-        if ad_lat is None or ad_lng is None:
+    for ad in ads:
+        # The index may lag a write on another worker; re-check the document itself
+        if ad.get("visibility") != "visible" or ad.get("business", {}).get("category") != "Restaurants":
             continue
+        ad["distance"] = distances[ad["_id"]]
+        location = ad.get("location", {})
 
-        distance = calculate_distance(lat, lng, ad_lat, ad_lng)
-
-        if distance <= max_distance_km:
-            # Return raw dictionary instead of Pydantic model to bypass all validations
-            nearby_ads.append({
-                "ad_id": str(ad["_id"]),
-                "title": ad.get("business", {}).get("title", "Untitled Ad"),
-                "image_url": ad.get("images", [None])[0],
-                "city": location.get("city"),
-                "district": location.get("district"),
-                "category": ad.get("category"),
-                "contact_name": ad.get("contact", {}).get("name"),
-                "contact_phone": ad.get("contact", {}).get("phone"),
-                "priority_score": 0  # or set based on logic
-            })
+        # Return raw dictionary instead of Pydantic model to bypass all validations
+        nearby_ads.append({
+            "ad_id": str(ad["_id"]),
+            "title": ad.get("business", {}).get("title", "Untitled Ad"),
+            "image_url": ad.get("images", [None])[0],
+            "city": location.get("city"),
+            "district": location.get("district"),
+            "category": ad.get("business", {}).get("category"),
+            "contact_name": ad.get("contact", {}).get("name"),
+            "contact_phone": ad.get("contact", {}).get("phone"),
+            "distance_km": round(ad.get("distance", 0), 3),
+            "priority_score": 0  # or set based on logic
+        })
 
-    return nearby_ads
+    return ORJSONResponse(nearby_ads)
 @ads_router.delete(
     "/{ad_id}",
     response_model=AdDeleteResponse,
@@ -790,6 +774,12 @@ async def delete_ad(ad_id: str,  current_user: dict = Depends(get_current_user))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Ad not found")
 
+    await delete_ad_reactions(obj_id)
+    invalidate_ad_sets()
+    invalidate_home_feed("carousel", "top")
+    drop_ad_location(obj_id)
+    drop_ad_suggestions(obj_id)
+
     try:
         image_folder = os.path.join(BASE_IMAGE_PATH, ad_id)
         if os.path.exists(image_folder):
@@ -822,6 +812,10 @@ async def approve_ad_by_admin(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ad ID format")
 
+    ad = await ads_collection.find_one({"_id": obj_id}, {"business": 1})
+    if not ad:
+        raise HTTPException(status_code=404, detail="Ad not found")
+
     # Extract admin identity securely
     admin_id = current_user.get("username") or current_user.get("email")
 
@@ -832,6 +826,7 @@ async def approve_ad_by_admin(
         "approval.adminComment": comment,
         "approval.approvedAt": datetime.utcnow(),
         "visibility": "visible" if status == "approved" else "hidden",
+        "priority_score": compute_priority_score(ad),
         "updatedAt": datetime.utcnow()
     }
 
@@ -841,6 +836,11 @@ async def approve_ad_by_admin(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Ad not found")
 
+    invalidate_ad_sets()
+    invalidate_home_feed("carousel", "top")
+    await refresh_ad_location(obj_id)
+    await refresh_ad_suggestions(obj_id)
+
     return AdApprovalResponse(
         ad_id=ad_id,
         status=status,
@@ -848,19 +848,44 @@ async def approve_ad_by_admin(
         approved_by=admin_id
     )
 
+# updatedAt alone misses the Stripe visibility flip and the reaction counters
+AD_VERSION_PROJECTION = {
+    "updatedAt": 1,
+    "visibility": 1,
+    "approval.status": 1,
+    "reactions.likes.count": 1,
+    "reactions.unlikes.count": 1,
+    "recommendations.count": 1,
+}
+
+
 @ads_router.get("/{ad_id}", responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},status_code=status.HTTP_200_OK)
-async def get_ad_details(ad_id: str):
+async def get_ad_details(
+    request: Request,
+    ad_id: str,
+    fields: Optional[str] = Query(None, description=f"Profile ({', '.join(FIELD_PROFILES)}) or comma-separated fields; defaults to detail")
+):
+    projection = resolve_projection(fields, "detail")
     try:
         obj_id = ObjectId(ad_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ad ID")
 
-    ad = await ads_collection.find_one({"_id": obj_id})
+    # Cheap indexed lookup of the fields every write to an ad touches; a match skips the full read
+    version = await ads_collection.find_one({"_id": obj_id}, AD_VERSION_PROJECTION)
+    if not version:
+        raise HTTPException(status_code=404, detail="Ad not found")
+
+    etag = make_etag("ad", version, projection)
+    headers = cache_headers(etag, DETAIL_MAX_AGE_SECONDS)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    ad = await ads_collection.find_one({"_id": obj_id}, projection)
     if not ad:
         raise HTTPException(status_code=404, detail="Ad not found")
 
-    ad["_id"] = str(ad["_id"])
-    return ad
+    return ORJSONResponse(ad, headers=headers)
 
 
 @ads_router.post(
@@ -884,37 +909,20 @@ async def like_ad(ad_id: str,  current_user: dict = Depends(get_current_user)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ad ID")
 
-    ad = await ads_collection.find_one({"_id": obj_id})
-    if not ad:
-        raise HTTPException(status_code=404, detail="Ad not found")
-
     try:
-        update_ops = {}
-        message = ""
-
-        if user_id in ad.get("reactions", {}).get("likes", {}).get("userIds", []):
-            update_ops = {
-                "$inc": {"reactions.likes.count": -1},
-                "$pull": {"reactions.likes.userIds": user_id}
-            }
-            message = "Like removed"
-        else:
-            update_ops = {
-                "$inc": {"reactions.likes.count": 1},
-                "$push": {"reactions.likes.userIds": user_id}
-            }
-            message = "Ad liked successfully"
-
-            # If user had previously unliked, remove it
-            if user_id in ad.get("reactions", {}).get("unlikes", {}).get("userIds", []):
-                update_ops["$inc"]["reactions.unlikes.count"] = -1
-                update_ops["$pull"] = {"reactions.unlikes.userIds": user_id}
-
-        await ads_collection.update_one({"_id": obj_id}, update_ops)
-        return {"message": message}
-
+        # Toggling also clears an earlier unlike
+        result = await toggle_vote(obj_id, user_id, "like")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update likes: {str(e)}")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Ad not found")
+    update_ad_popularity(obj_id, result["counts"])
+
+    return {
+        "message": "Ad liked successfully" if result["state"] == "like" else "Like removed",
+        **result
+    }
 @ads_router.post(
     "/{ad_id}/unlike",
     responses={
@@ -936,37 +944,37 @@ async def unlike_ad(ad_id: str,  current_user: dict = Depends(get_current_user))
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ad ID")
 
-    ad = await ads_collection.find_one({"_id": obj_id})
-    if not ad:
+    try:
+        # Toggling also clears an earlier like
+        result = await toggle_vote(obj_id, user_id, "unlike")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update unlikes: {str(e)}")
+
+    if result is None:
         raise HTTPException(status_code=404, detail="Ad not found")
+    update_ad_popularity(obj_id, result["counts"])
 
-    try:
-        update_ops = {}
-        message = ""
-
-        if user_id in ad.get("reactions", {}).get("unlikes", {}).get("userIds", []):
-            update_ops = {
-                "$inc": {"reactions.unlikes.count": -1},
-                "$pull": {"reactions.unlikes.userIds": user_id}
-            }
-            message = "Unlike removed"
-        else:
-            update_ops = {
-                "$inc": {"reactions.unlikes.count": 1},
-                "$push": {"reactions.unlikes.userIds": user_id}
-            }
-            message = "Ad unliked successfully"
+    return {
+        "message": "Ad unliked successfully" if result["state"] == "unlike" else "Unlike removed",
+        **result
+    }
 
-            # If user had previously liked, remove it
-            if user_id in ad.get("reactions", {}).get("likes", {}).get("userIds", []):
-                update_ops["$inc"]["reactions.likes.count"] = -1
-                update_ops["$pull"] = {"reactions.likes.userIds": user_id}
 
-        await ads_collection.update_one({"_id": obj_id}, update_ops)
-        return {"message": message}
+@ads_router.get(
+    "/{ad_id}/reactions/me",
+    responses={
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse}
+    },
+    status_code=status.HTTP_200_OK
+)
+async def get_my_reactions(ad_id: str, current_user: dict = Depends(get_current_user)):
+    try:
+        obj_id = ObjectId(ad_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ad ID")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to update unlikes: {str(e)}")
+    return await get_user_reactions(obj_id, current_user["user_id"])
 
 @ads_router.patch(
     "/{ad_id}/update",
@@ -1013,9 +1021,20 @@ async def update_ad_details(
             else:
                 updates[key] = value
 
+    if "location" in updates:
+        # Keep the GeoJSON point in sync with the edited coordinates
+        updates["location"] = with_geo_point(updates["location"])
+
     if not updates:
         raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
+    updates["priority_score"] = compute_priority_score({**ad, **updates})
+    if "business" in updates or "location" in updates:
+        updates.update(await ad_search_keys({**ad, **updates}))
+    if "schedule" in updates:
+        updates["openIntervals"] = open_intervals(updates["schedule"])
+    if "adSettings" in updates:
+        updates["purgeAt"] = compute_purge_at({**ad, **updates})
     updates["updatedAt"] = datetime.utcnow()
 
     # Apply update
@@ -1027,6 +1046,11 @@ async def update_ad_details(
     if result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Update failed")
 
+    invalidate_ad_sets()
+    invalidate_home_feed("carousel", "top")
+    await refresh_ad_location(ObjectId(ad_id))
+    await refresh_ad_suggestions(ObjectId(ad_id))
+
     return {
         "message": "Ad updated successfully",
         "adId": ad_id,
@@ -1057,28 +1081,19 @@ async def recommend_ad(ad_id: str, current_user: dict = Depends(get_current_user
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ad ID")
 
-    # Step 3: Fetch Ad
-    ad = await ads_collection.find_one({"_id": obj_id})
-    if not ad:
-        raise HTTPException(status_code=404, detail="Ad not found")
-
-    # Step 4: Check if already recommended
-    if user_id in ad.get("recommendations", {}).get("userIds", []):
-        raise HTTPException(status_code=400, detail="You have already recommended this ad")
-
-    # Step 5: Update recommendations
+    # Step 3: Record the recommendation (the unique index rejects repeats)
     try:
-        await ads_collection.update_one(
-            {"_id": obj_id},
-            {
-                "$inc": {"recommendations.count": 1},
-                "$push": {"recommendations.userIds": user_id}
-            }
-        )
+        result = await add_recommendation(obj_id, user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update recommendations: {str(e)}")
 
-    return {"message": "Ad recommended successfully"}
+    if result is None:
+        raise HTTPException(status_code=404, detail="Ad not found")
+    if result["state"] == "already_recommended":
+        raise HTTPException(status_code=400, detail="You have already recommended this ad")
+    update_ad_popularity(obj_id, result["counts"])
+
+    return {"message": "Ad recommended successfully", **result}
 @ads_router.post("/webhook")
 async def stripe_webhook(request: Request, current_user: dict = Depends(get_current_user)):
     payload = await request.body()
@@ -1104,6 +1119,10 @@ async def stripe_webhook(request: Request, current_user: dict = Depends(get_curr
                 {"_id": ObjectId(ad_id)},
                 {"$set": {"visibility": "visible", "updatedAt": datetime.utcnow()}}
             )
+            invalidate_ad_sets()
+            invalidate_home_feed("carousel", "top")
+            await refresh_ad_location(ObjectId(ad_id))
+            await refresh_ad_suggestions(ObjectId(ad_id))
 
     elif event["type"] == "checkout.session.expired":
         print("⚠️ Session expired:", event["data"]["object"]["id"])
@@ -1,14 +1,16 @@
 import json
 import os
 from typing import List
-from fastapi import APIRouter, HTTPException, status, UploadFile, Form, File, Depends
+from fastapi import APIRouter, HTTPException, status, UploadFile, Form, File, Depends, Request, Response
 from data_models.blog_model import BlogPost, UpdateBlogRequest
 from databases.mongo import db
 from bson import ObjectId
 from datetime import datetime
 
+from services.collection_version_service import bump_collection_version
 from services.file_upload_service import save_uploaded_images
 from utils.auth.jwt_functions import get_admin_or_super
+from utils.responses.conditional import LIST_MAX_AGE_SECONDS, collection_etag, conditional
 
 blog_router = APIRouter(prefix="/blog", tags=["Blog"])
 blog_collection = db["blogs"]
@@ -56,6 +58,8 @@ async def create_blog(
 
             post_data["img_url"] = first_image_url
 
+        await bump_collection_version("blogs")
+
         # Return the created blog post
         post_data["id"] = blog_id
         return BlogPost(**post_data)
@@ -67,7 +71,12 @@ async def create_blog(
 
 # --- Get all blog posts ---
 @blog_router.get("/", response_model=list[BlogPost])
-async def get_all_blogs():
+async def get_all_blogs(request: Request, response: Response):
+    etag = await collection_etag("blogs")
+    not_modified = conditional(request, response, etag, LIST_MAX_AGE_SECONDS)
+    if not_modified:
+        return not_modified
+
     blogs = []
     async for post in blog_collection.find().sort("createdAt", -1):
         post["id"] = str(post["_id"])
@@ -109,6 +118,7 @@ async def update_blog(
         )
 
         if result:
+            await bump_collection_version("blogs")
             result["id"] = str(result["_id"])
             del result["_id"]
             return BlogPost(**result)
@@ -128,6 +138,7 @@ async def delete_blog(
         result = await blog_collection.delete_one({"_id": ObjectId(blog_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Blog post not found")
+        await bump_collection_version("blogs")
         return
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid blog ID format")
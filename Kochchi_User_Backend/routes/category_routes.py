@@ -1,5 +1,5 @@
 from bson.errors import InvalidId
-from fastapi import APIRouter, HTTPException, Body, Depends
+from fastapi import APIRouter, HTTPException, Body, Depends, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 
 from databases.mongo import db
@@ -7,7 +7,12 @@ from data_models.category_model import Category, CategoryResponse, CreateCategor
 from bson import ObjectId
 from typing import List, Optional
 
+from services.ad_keys_service import invalidate_category_aliases
+from services.collection_version_service import bump_collection_version
+from services.home_feed_service import invalidate_home_feed
+from services.suggest_index_service import invalidate_suggestions
 from utils.auth.jwt_functions import get_current_user
+from utils.responses.conditional import LIST_MAX_AGE_SECONDS, collection_etag, conditional
 
 category_router = APIRouter(prefix="/categories", tags=["Categories"])
 category_collection = db["categories"]
@@ -24,6 +29,10 @@ async def create_category(data: Category, current_user: dict = Depends(get_curre
         raise HTTPException(status_code=400, detail="Category already exists")
 
     result = await category_collection.insert_one(data.dict())
+    invalidate_category_aliases()
+    invalidate_suggestions()
+    await bump_collection_version("categories")
+    invalidate_home_feed("categories")
     return {
         "message": "Category created successfully",
         "category_id": str(result.inserted_id)
@@ -31,7 +40,12 @@ async def create_category(data: Category, current_user: dict = Depends(get_curre
 
 # ✅ Get all categories
 @category_router.get("/", response_model=List[CategoryResponse])
-async def get_all_categories():
+async def get_all_categories(request: Request, response: Response):
+    etag = await collection_etag("categories")
+    not_modified = conditional(request, response, etag, LIST_MAX_AGE_SECONDS)
+    if not_modified:
+        return not_modified
+
     categories = []
     async for cat in category_collection.find():
         cat["id"] = str(cat["_id"])
@@ -53,6 +67,10 @@ async def delete_category(category_id: str):
     result = await category_collection.delete_one({"_id": ObjectId(category_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
+    invalidate_category_aliases()
+    invalidate_suggestions()
+    await bump_collection_version("categories")
+    invalidate_home_feed("categories")
     return {"message": "Category deleted", "category_id": category_id}
 
 
@@ -72,6 +90,11 @@ async def update_category(category_id: str, data: Category = Body(...)):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
 
+    invalidate_category_aliases()
+    invalidate_suggestions()
+    await bump_collection_version("categories")
+    invalidate_home_feed("categories")
+
     return {
         "message": "Category updated successfully",
         "category_id": category_id
@@ -1,7 +1,7 @@
 import os
 import json
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, status, Body,Form, File, UploadFile, Depends
+from fastapi import APIRouter, HTTPException, status, Body,Form, File, UploadFile, Depends, Request, Response
 from pymongo import ReturnDocument
 
 from data_models.competition_model import Competition, CreateCompetitionRequest, UpdateCompetitionRequest, AddWinnerRequest
@@ -9,8 +9,10 @@ from databases.mongo import db
 from bson import ObjectId
 from datetime import datetime
 
+from services.collection_version_service import bump_collection_version
 from services.file_upload_service import save_uploaded_images
 from utils.auth.jwt_functions import get_admin_or_super
+from utils.responses.conditional import LIST_MAX_AGE_SECONDS, collection_etag, conditional
 
 competition_router = APIRouter(prefix="/competition", tags=["Competition"])
 competition_collection = db["competitions"]
@@ -103,6 +105,8 @@ async def create_competition(
                 )
                 data_dict["img_url"] = image_urls[0]
 
+        await bump_collection_version("competitions")
+
         data_dict["id"] = competition_id
         return Competition(**data_dict)
 
@@ -156,6 +160,7 @@ async def add_winner(
 
         if not updated:
             raise HTTPException(status_code=500, detail="Failed to add winner to competition")
+        await bump_collection_version("competitions")
 
         # Format and return the updated competition
         updated["id"] = str(updated["_id"])
@@ -169,7 +174,12 @@ async def add_winner(
 
 # --- Get all competitions ---
 @competition_router.get("/", response_model=list[Competition])
-async def get_all_competitions():
+async def get_all_competitions(request: Request, response: Response):
+    etag = await collection_etag("competitions")
+    not_modified = conditional(request, response, etag, LIST_MAX_AGE_SECONDS)
+    if not_modified:
+        return not_modified
+
     try:
         competitions = []
         async for doc in competition_collection.find().sort("createdAt", -1):
@@ -211,6 +221,7 @@ async def complete_competition(
 
         if not updated:
             raise HTTPException(status_code=404, detail="Competition not found")
+        await bump_collection_version("competitions")
 
         # Format and return the updated competition
         updated["id"] = str(updated["_id"])
@@ -255,6 +266,7 @@ async def update_competition(
         )
 
         if result:
+            await bump_collection_version("competitions")
             result["id"] = str(result["_id"])
             del result["_id"]
             return Competition(**result)
@@ -275,6 +287,7 @@ async def delete_competition(
         result = await competition_collection.delete_one({"_id": ObjectId(competition_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Competition not found")
+        await bump_collection_version("competitions")
         return
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid competition ID format")
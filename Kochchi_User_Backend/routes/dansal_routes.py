@@ -12,7 +12,9 @@ from databases.mongo import db
 from data_models.dansal_model import DansalEntry, DansalRequestModel
 from bson import ObjectId
 
-from services.distance_radius_calculator import calculate_distance
+from services.spatial_index_service import (
+    MAX_RADIUS_KM, nearby_dansal_ids, index_dansal_location, drop_dansal_location
+)
 from services.file_upload_service import save_uploaded_images
 from utils.auth.jwt_functions import get_current_user
 from utils.examples.ads import ads_description
@@ -73,6 +75,7 @@ async def create_dansal(
         dansal_dict["userId"] = current_user["user_id"]
         result = await dansal_collection.insert_one(dansal_dict)
         dansal_id = str(result.inserted_id)
+        index_dansal_location(result.inserted_id, dansal_dict.get("location"))
 
         image_urls = []
         if images:
@@ -95,19 +98,25 @@ async def create_dansal(
 
 # --- Endpoint: Get nearby Dansal events ---
 @dansal_router.get("/nearby", response_model=List[DansalEntry])
-async def get_nearby_dansal(lat: float = Query(...), lon: float = Query(...), max_km: float = 20):
+async def get_nearby_dansal(
+        lat: float = Query(...),
+        lon: float = Query(...),
+        max_km: float = Query(20, gt=0, le=MAX_RADIUS_KM)
+):
     try:
-        all_dansal = await dansal_collection.find().to_list(length=None)
+        # Grid index lookup, nearest first; only the dansals in range are read
+        hits = await nearby_dansal_ids(lat, lon, max_km)
+        found = await dansal_collection.find({"_id": {"$in": [_id for _id, _ in hits]}}).to_list(length=len(hits))
+        by_id = {d["_id"]: d for d in found}
         nearby = []
 
-        for d in all_dansal:
-            loc = d.get("location", {})
-            if "latitude" in loc and "longitude" in loc:
-                distance = calculate_distance(lat, lon, loc["latitude"], loc["longitude"])
-                if distance <= max_km:
-                    d["id"] = str(d["_id"])
-                    d.pop("_id", None)
-                    nearby.append(DansalEntry(**d))
+        for _id, _ in hits:
+            d = by_id.get(_id)
+            if not d:
+                continue
+            d["id"] = str(d["_id"])
+            d.pop("_id", None)
+            nearby.append(DansalEntry(**d))
         return nearby
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,4 +161,5 @@ async def delete_dansal(dansal_id: str, current_user: dict = Depends(get_current
     if not dansal:
         raise HTTPException(status_code=404, detail="Dansal not found")
     await dansal_collection.delete_one({"_id": ObjectId(dansal_id)})
+    drop_dansal_location(ObjectId(dansal_id))
     return {"message": "Dansal deleted successfully"}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, status
+
+from services.home_feed_service import home_feed
+from utils.responses.orjson_response import ORJSONResponse
+
+feed_router = APIRouter(prefix="/feed", tags=["Feed"])
+
+
+# 🔹 Everything the homepage loads, in one round trip
+@feed_router.get(
+    "/home",
+    summary="Homepage feed",
+    description="Carousel ads, page 1 of the top ads (with its shuffle seed), popup ads, notifications "
+                "and categories. Sections are loaded concurrently and cached separately; a section "
+                "that fails to load is null.",
+    status_code=status.HTTP_200_OK
+)
+async def get_home_feed():
+    return ORJSONResponse(await home_feed())
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, status
+
+from services.ad_expiry_job import last_ad_expiry_run
+from services.spatial_index_service import spatial_index_stats
+from services.suggest_index_service import suggest_index_stats
+from utils.auth.jwt_functions import get_admin_or_super
+from utils.responses.compression import compression_cache_stats
+
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# 🔹 In-process spatial index size and rebuild timing (per worker)
+@metrics_router.get("/spatial-index", status_code=status.HTTP_200_OK)
+async def get_spatial_index_metrics(current_user: dict = Depends(get_admin_or_super)):
+    return spatial_index_stats()
+
+
+# 🔹 Cached compressed bodies for the hot endpoints (per worker)
+@metrics_router.get("/compression-cache", status_code=status.HTTP_200_OK)
+async def get_compression_cache_metrics(current_user: dict = Depends(get_admin_or_super)):
+    return compression_cache_stats()
+
+
+# 🔹 In-process autocomplete index size and rebuild timing (per worker)
+@metrics_router.get("/suggest-index", status_code=status.HTTP_200_OK)
+async def get_suggest_index_metrics(current_user: dict = Depends(get_admin_or_super)):
+    return suggest_index_stats()
+
+
+# 🔹 Progress and timing of the latest expire_ads.py run
+@metrics_router.get("/expiry-job", status_code=status.HTTP_200_OK)
+async def get_expiry_job_metrics(current_user: dict = Depends(get_admin_or_super)):
+    return await last_ad_expiry_run() or {"status": "never run"}
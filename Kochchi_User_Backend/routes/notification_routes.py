@@ -1,12 +1,15 @@
 import os
 from typing import List
-from fastapi import APIRouter, HTTPException, status, Form, Depends
+from fastapi import APIRouter, HTTPException, status, Form, Depends, Request, Response
 from data_models.notification_model import Notification, UpdateNotificationRequest
 from databases.mongo import db
 from bson import ObjectId
 from datetime import datetime
 
+from services.collection_version_service import bump_collection_version
+from services.home_feed_service import invalidate_home_feed
 from utils.auth.jwt_functions import get_admin_or_super
+from utils.responses.conditional import LIST_MAX_AGE_SECONDS, collection_etag, conditional
 
 notification_router = APIRouter(prefix="/notifications", tags=["Notifications"])
 notification_collection = db["notifications"]
@@ -32,6 +35,8 @@ async def create_notification(
             raise HTTPException(status_code=500, detail="Failed to create notification")
 
         notification_id = str(result.inserted_id)
+        await bump_collection_version("notifications")
+        invalidate_home_feed("notifications")
 
         # Return the created notification
         notification_data["id"] = notification_id
@@ -44,7 +49,12 @@ async def create_notification(
 
 # --- Get all notifications ---
 @notification_router.get("/", response_model=List[Notification])
-async def get_all_notifications():
+async def get_all_notifications(request: Request, response: Response):
+    etag = await collection_etag("notifications")
+    not_modified = conditional(request, response, etag, LIST_MAX_AGE_SECONDS)
+    if not_modified:
+        return not_modified
+
     notifications = []
     async for notification in notification_collection.find().sort("createdAt", -1):
         notification["id"] = str(notification["_id"])
@@ -82,6 +92,8 @@ async def update_notification(
         )
 
         if result:
+            await bump_collection_version("notifications")
+            invalidate_home_feed("notifications")
             result["id"] = str(result["_id"])
             del result["_id"]
             return Notification(**result)
@@ -100,6 +112,8 @@ async def delete_notification(
         result = await notification_collection.delete_one({"_id": ObjectId(notification_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Notification not found")
+        await bump_collection_version("notifications")
+        invalidate_home_feed("notifications")
         return
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid notification ID format") 
\ No newline at end of file
@@ -4,6 +4,10 @@ import cloudinary.uploader
 from fastapi import APIRouter, Request, HTTPException
 from data_models.payment_model import PaymentRequest, RefundRequest
 from databases.mongo import db  # <-- Import directly from your database layer
+from services.ad_cache_service import invalidate_ad_sets
+from services.home_feed_service import invalidate_home_feed
+from services.spatial_index_service import drop_ad_location, refresh_ad_location
+from services.suggest_index_service import drop_ad_suggestions, refresh_ad_suggestions
 from dotenv import load_dotenv
 load_dotenv()
 # FastAPI router
@@ -68,6 +72,10 @@ async def stripe_webhook(request: Request):
         ad = await ads_collection.find_one({"stripeSessionId": session_id})
         if ad:
             await ads_collection.delete_one({"_id": ad["_id"]})
+            invalidate_ad_sets()
+            invalidate_home_feed("carousel", "top")
+            drop_ad_location(ad["_id"])
+            drop_ad_suggestions(ad["_id"])
             for url in ad.get("images", []):
                 try:
                     parts = url.split("/")
@@ -78,10 +86,16 @@ async def stripe_webhook(request: Request):
 
     elif event_type == "checkout.session.completed":
         session_id = session.get("id")
-        await ads_collection.update_one(
+        ad = await ads_collection.find_one_and_update(
             {"stripeSessionId": session_id},
-            {"$set": {"visibility": "visible"}}
+            {"$set": {"visibility": "visible"}},
+            projection={"_id": 1}
         )
+        invalidate_ad_sets()
+        invalidate_home_feed("carousel", "top")
+        if ad:
+            await refresh_ad_location(ad["_id"])
+            await refresh_ad_suggestions(ad["_id"])
 
     return {"status": "ok"}
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request, Response, status
 from datetime import datetime
 from bson import ObjectId
 import os
@@ -9,7 +9,10 @@ from fastapi.security import OAuth2PasswordBearer
 from data_models.popup_model import PopupAdOut, PopupAdCreate
 from databases.mongo import db
 from utils.auth.jwt_functions import get_admin_or_super
+from services.collection_version_service import bump_collection_version
+from services.home_feed_service import invalidate_home_feed
 from services.file_upload_service import save_uploaded_images
+from utils.responses.conditional import LIST_MAX_AGE_SECONDS, collection_etag, conditional
 
 popup_router = APIRouter(prefix="/popup-ads", tags=["Popup Ads"])
 POPUP_IMAGE_PATH = "data_sources/popup_ads"
@@ -61,6 +64,9 @@ async def create_popup_ad(
             # If image upload fails, still return the popup ad without image
             print(f"Image upload failed: {str(e)}")
 
+        await bump_collection_version("popup_ads")
+        invalidate_home_feed("popups")
+
         # Return the created popup ad
         ad_doc["adId"] = ad_id
         return PopupAdOut(**ad_doc)
@@ -72,7 +78,12 @@ async def create_popup_ad(
 
 # 🔹 Get All Popup Ads
 @popup_router.get("/", response_model=List[PopupAdOut])
-async def get_all_popup_ads():
+async def get_all_popup_ads(request: Request, response: Response):
+    etag = await collection_etag("popup_ads")
+    not_modified = conditional(request, response, etag, LIST_MAX_AGE_SECONDS)
+    if not_modified:
+        return not_modified
+
     ads = []
     async for ad in popup_ads_collection.find().sort("createdAt", -1):
         ad["adId"] = str(ad["_id"])
@@ -90,6 +101,8 @@ async def delete_popup_ad(
         result = await popup_ads_collection.delete_one({"_id": ObjectId(ad_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Popup Ad not found")
+        await bump_collection_version("popup_ads")
+        invalidate_home_feed("popups")
         return
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid popup ad ID format")
@@ -0,0 +1,85 @@
+import asyncio
+import random
+from typing import List, Dict, Any
+
+from bson import ObjectId
+from cachetools import TTLCache
+
+from databases.mongo import db
+
+ads_collection = db["ads"]
+
+# Visible homepage ad sets, keyed by name. Only the _ids are cached (a few bytes per ad);
+# the documents for a selection are fetched with one indexed $in.
+AD_SETS = {
+    "top": {"adSettings.isTopAd": True, "visibility": "visible"},
+}
+
+# /ads/top-full-ads page size
+TOP_PAGE_SIZE = 24
+
+# Writes on this worker invalidate immediately; the TTL bounds staleness for writes
+# that happened on another worker.
+AD_SET_TTL_SECONDS = 300
+
+_ad_set_cache: TTLCache = TTLCache(maxsize=len(AD_SETS), ttl=AD_SET_TTL_SECONDS)
+_ad_set_locks = {name: asyncio.Lock() for name in AD_SETS}
+
+# Seeded shuffles of a set, so paging through a shuffled listing stays stable. Seeds are
+# folded into SHUFFLE_SEEDS distinct orders, so client-chosen seeds can't churn the cache:
+# every possible order of every set fits in it at once.
+SHUFFLE_SEEDS = 64
+SHUFFLE_TTL_SECONDS = 600
+_shuffle_cache: TTLCache = TTLCache(maxsize=SHUFFLE_SEEDS * len(AD_SETS), ttl=SHUFFLE_TTL_SECONDS)
+
+
+async def get_ad_set_ids(name: str) -> List[ObjectId]:
+    """_ids of the visible ads in the set, from cache or one projected query"""
+    ids = _ad_set_cache.get(name)
+    if ids is not None:
+        return ids
+
+    async with _ad_set_locks[name]:
+        # Concurrent misses wait for the first loader instead of all scanning
+        ids = _ad_set_cache.get(name)
+        if ids is None:
+            cursor = ads_collection.find(AD_SETS[name], {"_id": 1})
+            ids = [doc["_id"] async for doc in cursor]
+            _ad_set_cache[name] = ids
+    return ids
+
+
+async def fetch_ads_by_ids(ids: List[ObjectId]) -> List[Dict[str, Any]]:
+    """Fetches ads by _id and returns them in the order of `ids` (missing ads are skipped)"""
+    if not ids:
+        return []
+    docs = await ads_collection.find({"_id": {"$in": ids}}).to_list(length=len(ids))
+    by_id = {doc["_id"]: doc for doc in docs}
+    return [by_id[_id] for _id in ids if _id in by_id]
+
+
+def new_shuffle_seed() -> int:
+    return random.randint(1, SHUFFLE_SEEDS)
+
+
+async def shuffled_ad_set_ids(name: str, seed: int) -> List[ObjectId]:
+    """
+    The set's ids in a permutation fixed by `seed`, computed once and cached.
+    The base order is sorted by _id, so the same seed gives the same order on any worker
+    as long as the set itself hasn't changed. Any positive seed is accepted and folded
+    into 1..SHUFFLE_SEEDS.
+    """
+    seed = (seed - 1) % SHUFFLE_SEEDS + 1
+    key = (name, seed)
+    ids = _shuffle_cache.get(key)
+    if ids is None:
+        ids = sorted(await get_ad_set_ids(name))
+        random.Random(seed).shuffle(ids)
+        _shuffle_cache[key] = ids
+    return ids
+
+
+def invalidate_ad_sets():
+    """Call after any write that can change an ad's visibility or top flag"""
+    _ad_set_cache.clear()
+    _shuffle_cache.clear()
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import cloudinary.api
+from pymongo import DeleteOne
+from pymongo.errors import BulkWriteError
+
+import services.cloudinary_service  # noqa: F401  configures the SDK, expire_ads.py loads nothing else that does
+from databases.mongo import db
+from services.expiry_service import ASSET_FOLDERS, asset_cleanups_collection
+from services.reaction_service import ad_reactions_collection
+
+ads_collection = db["ads"]
+# Progress of the latest run, one document per job, shown at /metrics/expiry-job
+job_runs_collection = db["job_runs"]
+
+JOB_ID = "ad_expiry"
+BATCH_SIZE = 200
+# Default throughput cap; each batch is followed by a pause that keeps the job under it
+DOCS_PER_SECOND = 100
+# Cloudinary's delete_resources takes at most 100 public IDs per call
+CLOUDINARY_DELETE_LIMIT = 100
+
+
+def image_public_id(url: str) -> Optional[str]:
+    """Cloudinary public ID ("ads/<id>/<name>") from a delivery URL, as the upload routes do"""
+    try:
+        parts = url.split("/")
+        return "/".join(parts[parts.index("ads"):-1]) + "/" + parts[-1].split(".")[0]
+    except (AttributeError, ValueError):
+        return None
+
+
+def _delete_images(public_ids: List[str]) -> Dict[str, str]:
+    """public ID -> Cloudinary state ("deleted", "not_found", ...); IDs of failed calls are left out"""
+    states = {}
+    for start in range(0, len(public_ids), CLOUDINARY_DELETE_LIMIT):
+        chunk = public_ids[start:start + CLOUDINARY_DELETE_LIMIT]
+        try:
+            states.update(cloudinary.api.delete_resources(chunk).get("deleted", {}))
+        except Exception as e:
+            print(f"❌ Cloudinary bulk delete failed for {len(chunk)} images: {e}")
+    return states
+
+
+async def _claim_folders(ad_ids: List[Any]):
+    """
+    Tells the deletion watchers (services/expiry_service.py) these folders are handled.
+    Only called once an ad's images are gone: a folder left unclaimed is cleaned up by
+    the watcher instead, so a failed Cloudinary call doesn't lose the images.
+    """
+    if not ad_ids:
+        return
+    now = datetime.utcnow()
+    claims = [{"_id": ASSET_FOLDERS["ads"].format(id=ad_id), "claimedAt": now} for ad_id in ad_ids]
+    try:
+        await asset_cleanups_collection.insert_many(claims, ordered=False)
+    except BulkWriteError:
+        pass  # some were already claimed
+
+
+async def _save_progress(report: Dict[str, Any]):
+    await job_runs_collection.replace_one({"_id": JOB_ID}, {"_id": JOB_ID, **report}, upsert=True)
+
+
+async def _expire_batch(ads: List[Dict[str, Any]], now: datetime) -> Dict[str, int]:
+    ids = [ad["_id"] for ad in ads]
+
+    # Re-checking purgeAt keeps an ad that was upgraded to top/carousel since it was read
+    result = await ads_collection.bulk_write(
+        [DeleteOne({"_id": _id, "purgeAt": {"$lte": now}}) for _id in ids], ordered=False
+    )
+    if result.deleted_count < len(ids):
+        survivors = {doc["_id"] async for doc in ads_collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+        ads = [ad for ad in ads if ad["_id"] not in survivors]
+
+    deleted_ids = [ad["_id"] for ad in ads]
+    if deleted_ids:
+        await ad_reactions_collection.delete_many({"adId": {"$in": deleted_ids}})
+
+    images_of = {
+        ad["_id"]: [public_id for url in ad.get("images") or [] if (public_id := image_public_id(url))]
+        for ad in ads
+    }
+    public_ids = [public_id for ad_images in images_of.values() for public_id in ad_images]
+    # The Cloudinary SDK is blocking; keep it off the event loop
+    states = await asyncio.to_thread(_delete_images, public_ids) if public_ids else {}
+
+    gone = {public_id for public_id, state in states.items() if state in ("deleted", "not_found")}
+    await _claim_folders([ad_id for ad_id, ad_images in images_of.items() if gone.issuperset(ad_images)])
+
+    return {
+        "deleted": result.deleted_count,
+        "images": len(public_ids),
+        "images_deleted": sum(1 for state in states.values() if state == "deleted"),
+    }
+
+
+async def run_ad_expiry(
+        batch_size: int = BATCH_SIZE,
+        docs_per_second: float = DOCS_PER_SECOND,
+        max_batches: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Deletes ads whose purgeAt has passed, walking them by _id in bounded batches and
+    pausing between batches to stay under docs_per_second. Their images go with bulk
+    Cloudinary deletes and their ad_reactions rows with one delete_many per batch. Ads the job doesn't reach are removed by the purgeAt TTL index
+    AD_TTL_GRACE_SECONDS later (and their folder by the deletion watchers).
+    """
+    now = datetime.utcnow()
+    report: Dict[str, Any] = {
+        "startedAt": now, "finishedAt": None, "status": "running",
+        "batches": 0, "scanned": 0, "deleted": 0, "images": 0, "images_deleted": 0,
+        "last_id": None, "seconds": 0.0, "slowest_batch_seconds": 0.0,
+    }
+    started = time.perf_counter()
+    last_id = None
+
+    try:
+        while max_batches is None or report["batches"] < max_batches:
+            batch_started = time.perf_counter()
+            query: Dict[str, Any] = {"purgeAt": {"$lte": now}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            ads = await ads_collection.find(query, {"images": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not ads:
+                break
+
+            counts = await _expire_batch(ads, now)
+            last_id = ads[-1]["_id"]
+
+            batch_seconds = time.perf_counter() - batch_started
+            report["batches"] += 1
+            report["scanned"] += len(ads)
+            for key, value in counts.items():
+                report[key] += value
+            report["last_id"] = last_id
+            report["seconds"] = round(time.perf_counter() - started, 3)
+            report["slowest_batch_seconds"] = round(max(report["slowest_batch_seconds"], batch_seconds), 3)
+            await _save_progress(report)
+            print(f"🧹 Batch {report['batches']}: {counts['deleted']} ads, {counts['images_deleted']} images in {batch_seconds:.2f}s")
+
+            # Throttle: a batch of N docs takes at least N / docs_per_second seconds
+            await asyncio.sleep(max(0.0, len(ads) / docs_per_second - batch_seconds))
+
+        report["status"] = "finished"
+    except Exception as e:
+        report["status"] = f"failed: {e}"
+        raise
+    finally:
+        report["finishedAt"] = datetime.utcnow()
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        await _save_progress(report)
+
+    return report
+
+
+async def last_ad_expiry_run() -> Optional[Dict[str, Any]]:
+    return await job_runs_collection.find_one({"_id": JOB_ID}, {"_id": 0})
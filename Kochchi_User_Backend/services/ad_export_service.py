@@ -0,0 +1,58 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+from utils.ads.ad_flatten import flat_keys, flattener
+from utils.responses.orjson_response import dumps
+
+# Documents per cursor round trip, and bytes buffered before a chunk is sent
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return dumps(value).decode()
+    return value
+
+
+async def stream_ndjson(cursor, projection: Optional[Dict[str, int]]) -> AsyncIterator[bytes]:
+    """One flattened ad per line; memory is bounded by one cursor batch plus one chunk"""
+    flatten_ad = flattener(projection)
+    buffer = bytearray()
+    async for ad in cursor:
+        buffer += dumps(flatten_ad(ad))
+        buffer += b"\n"
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def stream_csv(cursor, projection: Optional[Dict[str, int]]) -> AsyncIterator[bytes]:
+    """Header row first (sent before the first query returns), then the flattened ads"""
+    flatten_ad = flattener(projection)
+    columns = flat_keys(projection)
+    text = io.StringIO()
+    writer = csv.writer(text)
+
+    writer.writerow(columns)
+    yield text.getvalue().encode()
+    text.seek(0)
+    text.truncate()
+
+    async for ad in cursor:
+        item = flatten_ad(ad)
+        writer.writerow([_csv_cell(item.get(column)) for column in columns])
+        if text.tell() >= EXPORT_CHUNK_BYTES:
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode()
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from databases.mongo import db
+
+ads_collection = db["ads"]
+
+# facet name -> (group key, label shown to users, filter key it conflicts with)
+# category and city group on the normalized keys, so "Restaurant" and "restaurant " count together.
+FACETS: Dict[str, Tuple[Any, Optional[str], Optional[str]]] = {
+    "category": ("$categoryKey", "$business.category", "categoryKey"),
+    "city": ("$cityKey", "$location.city", "cityKey"),
+    "district": ("$location.district", "$location.district", None),
+    "halal": ({"$in": ["$adSettings.hasHalal", [True, "true", "yes", "Yes", 1]]}, None, None),
+}
+FACET_LIMIT = 100
+
+FACET_TTL_SECONDS = 60
+_facet_cache: TTLCache = TTLCache(maxsize=512, ttl=FACET_TTL_SECONDS)
+
+
+def facet_pipeline(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One $facet aggregation for all counts. Counts are disjunctive: each facet applies every
+    current filter except its own, so with a category selected the category facet still
+    lists the other categories (with the city filter applied) instead of a single bucket.
+    """
+    facet_filter_keys = {key for _, _, key in FACETS.values() if key}
+    base = {field: value for field, value in query.items() if field not in facet_filter_keys}
+    selected = {field: value for field, value in query.items() if field in facet_filter_keys}
+
+    facets = {"total": [{"$match": selected}, {"$count": "count"}]}
+    for name, (group_key, label, own_key) in FACETS.items():
+        others = {field: value for field, value in selected.items() if field != own_key}
+        group: Dict[str, Any] = {"_id": group_key, "count": {"$sum": 1}}
+        if label:
+            group["label"] = {"$first": label}
+        stages = [{"$match": others}, {"$group": group}]
+        if label:
+            stages.append({"$match": {"_id": {"$nin": [None, ""]}}})
+        stages += [{"$sort": {"count": -1, "_id": 1}}, {"$limit": FACET_LIMIT}]
+        facets[name] = stages
+
+    return [{"$match": base}, {"$facet": facets}]
+
+
+def _buckets(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"key": row["_id"], "label": row.get("label", row["_id"]), "count": row["count"]} for row in rows]
+
+
+async def facet_counts(query: Dict[str, Any]) -> Dict[str, Any]:
+    """Counts for `query` (a visible_ads_query), cached per normalized filter for FACET_TTL_SECONDS"""
+    key = repr(sorted(query.items()))
+    counts = _facet_cache.get(key)
+    if counts is not None:
+        return counts
+
+    result = await ads_collection.aggregate(facet_pipeline(query)).to_list(length=1)
+    facets = result[0] if result else {}
+    total = facets.get("total") or [{"count": 0}]
+    counts = {"total": total[0]["count"]}
+    for name in FACETS:
+        counts[name] = _buckets(facets.get(name, []))
+    _facet_cache[key] = counts
+    return counts
@@ -0,0 +1,64 @@
+import re
+import unicodedata
+from typing import Optional, Dict, Any
+
+from cachetools import TTLCache
+
+from databases.mongo import db
+
+category_collection = db["categories"]
+
+# Normalized name/alias -> normalized category name, rebuilt from `categories`
+ALIAS_TTL_SECONDS = 300
+_alias_cache: TTLCache = TTLCache(maxsize=1, ttl=ALIAS_TTL_SECONDS)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_key(value: Any) -> Optional[str]:
+    """Casefolded, trimmed, single-spaced form used for exact, indexable matching"""
+    if value is None:
+        return None
+    key = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(value))).strip().casefold()
+    return key or None
+
+
+async def _category_aliases() -> Dict[str, str]:
+    aliases = _alias_cache.get("aliases")
+    if aliases is None:
+        aliases = {}
+        async for category in category_collection.find({}, {"name": 1, "aliases": 1}):
+            name = normalize_key(category.get("name"))
+            if not name:
+                continue
+            aliases[name] = name
+            for alias in category.get("aliases") or []:
+                alias = normalize_key(alias)
+                if alias:
+                    aliases.setdefault(alias, name)
+        _alias_cache["aliases"] = aliases
+    return aliases
+
+
+def invalidate_category_aliases():
+    """Call after any write to the categories collection"""
+    _alias_cache.clear()
+
+
+async def category_key(value: Any) -> Optional[str]:
+    key = normalize_key(value)
+    if key is None:
+        return None
+    return (await _category_aliases()).get(key, key)
+
+
+def city_key(value: Any) -> Optional[str]:
+    return normalize_key(value)
+
+
+async def ad_search_keys(ad: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """categoryKey and cityKey for an ad document (or a merged update)"""
+    return {
+        "categoryKey": await category_key((ad.get("business") or {}).get("category")),
+        "cityKey": city_key((ad.get("location") or {}).get("city")),
+    }
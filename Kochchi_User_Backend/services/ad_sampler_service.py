@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from databases.mongo import db
+
+ads_collection = db["ads"]
+
+SAMPLE_WEIGHTS = ("plan", "recency")
+
+# The homepage carousel: a random pick of CAROUSEL_SIZE visible carousel ads
+CAROUSEL_QUERY = {"adSettings.isCarousalAd": True, "visibility": "visible"}
+CAROUSEL_SIZE = 8
+
+# Recency weight is 1 / (1 + age / RECENCY_HALF_WEIGHT_DAYS): 1/2 at that age, 1/3 at twice it,
+# 1/4 at three times. The decay is hyperbolic, not exponential, so older ads keep some exposure.
+RECENCY_HALF_WEIGHT_DAYS = 30
+MS_PER_DAY = 86_400_000
+
+
+def weight_expression(weight_by: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Aggregation expression giving each ad a positive sampling weight"""
+    if weight_by == "plan":
+        # Ads paying for both top and carousel placement get twice the exposure
+        return {"$cond": [{"$eq": ["$adSettings.isTopAd", True]}, 2, 1]}
+    if weight_by == "recency":
+        now = now or datetime.utcnow()
+        age_days = {"$divide": [
+            {"$max": [0, {"$subtract": [now, {"$ifNull": ["$createdAt", now]}]}]},
+            MS_PER_DAY
+        ]}
+        return {"$divide": [1, {"$add": [1, {"$divide": [age_days, RECENCY_HALF_WEIGHT_DAYS]}]}]}
+    raise ValueError(f"Unknown sample weight: {weight_by}")
+
+
+def sample_pipeline(query: Dict[str, Any], size: int, weight_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    if not weight_by:
+        return [{"$match": query}, {"$sample": {"size": size}}]
+
+    # Weighted sampling without replacement (Efraimidis-Spirakis): keep the `size`
+    # largest rand^(1/weight). Mongo does it as a bounded top-k sort, so memory stays at
+    # `size` documents but every match is read and keyed: the cost is O(matches), as for
+    # $sample after a $match. A $sample-first candidate set would be O(size) but biased
+    # (or empty) for small sets like the carousel ads, so it isn't used.
+    weight = weight_expression(weight_by)
+    return [
+        {"$match": query},
+        {"$addFields": {"_sampleKey": {"$pow": [{"$rand": {}}, {"$divide": [1, weight]}]}}},
+        {"$sort": {"_sampleKey": -1}},
+        {"$limit": size},
+        {"$project": {"_sampleKey": 0}},
+    ]
+
+
+async def sample_ads(query: Dict[str, Any], size: int, weight_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Returns up to `size` random ads matching `query`; only those documents leave the database"""
+    return await ads_collection.aggregate(sample_pipeline(query, size, weight_by)).to_list(length=size)
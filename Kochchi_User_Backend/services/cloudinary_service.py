@@ -0,0 +1,13 @@
+import os
+
+import cloudinary
+from dotenv import load_dotenv
+load_dotenv()
+
+# Imported by everything that talks to Cloudinary (upload routes, deletion watchers,
+# expire_ads.py), so the SDK is configured whichever entry point loads first
+cloudinary.config(
+    cloud_name=os.getenv("CLOUD_NAME"),
+    api_key=os.getenv("CLOUD_API_KEY"),
+    api_secret=os.getenv("CLOUD_API_SECRET")
+)
@@ -0,0 +1,24 @@
+from pymongo import ReturnDocument
+
+from databases.mongo import db
+
+# One counter document per cached collection: {"_id": "<collection>", "version": n}.
+# Every write to the collection bumps it, on any worker, so it can stand in for the
+# collection's contents when building an ETag.
+versions_collection = db["collection_versions"]
+
+
+async def collection_version(name: str) -> int:
+    doc = await versions_collection.find_one({"_id": name}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+async def bump_collection_version(name: str) -> int:
+    """Call after every insert, update or delete on `name`"""
+    doc = await versions_collection.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
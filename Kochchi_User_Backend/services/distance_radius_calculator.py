@@ -1,6 +1,14 @@
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
 from fastapi import Query
 from math import radians, sin, cos, sqrt, atan2
 
+EARTH_RADIUS_KM = 6371.0
+
+T = TypeVar("T")
+
+
 # Haversine distance (km)
 def calculate_distance(lat1, lng1, lat2, lng2):
     R = 6371.0  # Earth radius in km
@@ -11,3 +19,44 @@ def calculate_distance(lat1, lng1, lat2, lng2):
     a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2)**2
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
     return R * c
+
+
+# Haversine distances (km) from one point to many, in a single vectorized pass
+def batch_distances(lat: float, lng: float, lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64)) - np.radians(lng)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def rank_by_distance(
+        lat: float,
+        lng: float,
+        items: Iterable[T],
+        coordinates_of: Callable[[T], Tuple[Optional[float], Optional[float]]],
+        max_km: Optional[float] = None
+) -> List[Tuple[T, float]]:
+    """
+    Scores every item with a known position in one batch and returns (item, km) pairs,
+    nearest first. Items without coordinates are dropped.
+    """
+    located, lats, lngs = [], [], []
+    for item in items:
+        item_lat, item_lng = coordinates_of(item)
+        if item_lat is None or item_lng is None:
+            continue
+        located.append(item)
+        lats.append(item_lat)
+        lngs.append(item_lng)
+
+    if not located:
+        return []
+
+    distances = batch_distances(lat, lng, lats, lngs)
+    order = np.argsort(distances, kind="stable")
+    if max_km is not None:
+        order = order[distances[order] <= max_km]
+    return [(located[i], float(distances[i])) for i in order]
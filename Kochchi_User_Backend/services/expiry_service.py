@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict
+
+import cloudinary.api
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+import services.cloudinary_service  # noqa: F401  configures the SDK
+from databases.mongo import db
+from services.ad_cache_service import invalidate_ad_sets
+from services.home_feed_service import invalidate_home_feed
+from services.reaction_service import delete_ad_reactions
+from services.spatial_index_service import drop_ad_location, drop_dansal_location
+from services.suggest_index_service import drop_ad_suggestions
+
+# Expiry itself is done by MongoDB's TTL monitor (dansal.endDateTime, ads.purgeAt; see
+# databases/indexes.py). This module only reacts to the deletes it makes.
+
+ads_collection = db["ads"]
+dansal_collection = db["dansal"]
+# One document per cleaned-up folder; the first worker to insert it does the cleanup
+asset_cleanups_collection = db["asset_cleanups"]
+# Last processed change per watched collection, so a restarted worker resumes where the
+# watchers stopped instead of missing the deletes made while none was running
+stream_tokens_collection = db["stream_tokens"]
+
+# Cloudinary folder per deleted document, as used at upload time
+ASSET_FOLDERS = {
+    "ads": "ads/{id}",
+    "dansal": "dansals/{id}",
+}
+
+# Wait before reopening a change stream that failed for a transient reason
+RESTART_DELAY_SECONDS = 30
+# The saved token fell off the oplog (ChangeStreamHistoryLost / ChangeStreamFatalError)
+TOKEN_LOST_CODES = (286, 280)
+
+
+def _delete_cloudinary_folder(folder: str) -> int:
+    deleted = cloudinary.api.delete_resources_by_prefix(f"{folder}/").get("deleted", {})
+    try:
+        cloudinary.api.delete_folder(folder)
+    except Exception:
+        pass  # already gone, or never created for documents without images
+    return len(deleted)
+
+
+async def cleanup_assets(collection_name: str, document_id: Any):
+    """Deletes a removed document's Cloudinary folder once, whichever worker gets there first"""
+    folder = ASSET_FOLDERS[collection_name].format(id=document_id)
+    try:
+        await asset_cleanups_collection.insert_one({"_id": folder, "claimedAt": datetime.utcnow()})
+    except DuplicateKeyError:
+        return
+
+    try:
+        # The Cloudinary SDK is blocking; keep it off the event loop
+        deleted = await asyncio.to_thread(_delete_cloudinary_folder, folder)
+        if deleted:
+            print(f"🧹 Deleted {deleted} Cloudinary assets in {folder}")
+    except Exception as e:
+        print(f"❌ Cloudinary cleanup failed for {folder}: {e}")
+
+
+async def on_deleted(collection_name: str, document_id: Any):
+    # In-memory indexes are per worker, so every worker drops its own copy
+    if collection_name == "ads":
+        invalidate_ad_sets()
+        invalidate_home_feed("carousel", "top")
+        drop_ad_location(document_id)
+        drop_ad_suggestions(document_id)
+        # Covers TTL expiry and the Stripe expired-session deletes, which skip the delete route
+        await delete_ad_reactions(document_id)
+    else:
+        drop_dansal_location(document_id)
+    await cleanup_assets(collection_name, document_id)
+
+
+async def _saved_token(collection_name: str):
+    saved = await stream_tokens_collection.find_one({"_id": collection_name})
+    return saved["token"] if saved else None
+
+
+async def _save_token(collection_name: str, token):
+    # Workers share the token; replaying from a slightly older one is harmless, every step is idempotent
+    await stream_tokens_collection.replace_one(
+        {"_id": collection_name},
+        {"_id": collection_name, "token": token, "savedAt": datetime.utcnow()},
+        upsert=True
+    )
+
+
+async def _watch(collection):
+    pipeline = [{"$match": {"operationType": "delete"}}]
+    token = await _saved_token(collection.name)
+    async with collection.watch(pipeline, resume_after=token) as stream:
+        async for change in stream:
+            await on_deleted(collection.name, change["documentKey"]["_id"])
+            await _save_token(collection.name, change["_id"])
+
+
+async def watch_deletions(collection):
+    """
+    Follows delete events (TTL expiry or explicit deletes) on one collection, resuming
+    from the last processed event. Change streams need a replica set; on a standalone
+    server expiry still happens and only the Cloudinary/reaction cleanup is skipped.
+    """
+    while True:
+        try:
+            await _watch(collection)
+        except OperationFailure as e:
+            if e.code in (40573, 136):  # not a replica set / change streams unsupported
+                print(f"⚠️ Change streams unavailable, Cloudinary cleanup for {collection.name} is off: {e}")
+                return
+            if e.code in TOKEN_LOST_CODES:
+                # Down longer than the oplog window: deletes in the gap are not cleaned up
+                print(f"⚠️ Resume token for {collection.name} expired, watching from now: {e}")
+                await stream_tokens_collection.delete_one({"_id": collection.name})
+                continue
+            print(f"❌ Deletion watcher for {collection.name} failed: {e}")
+        except PyMongoError as e:
+            print(f"❌ Deletion watcher for {collection.name} failed: {e}")
+        await asyncio.sleep(RESTART_DELAY_SECONDS)
+
+
+def start_expiry_watchers() -> Dict[str, asyncio.Task]:
+    return {
+        collection.name: asyncio.create_task(watch_deletions(collection))
+        for collection in (ads_collection, dansal_collection)
+    }
@@ -7,17 +7,12 @@ from PIL import Image, ImageDraw, ImageFont
 import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
+import services.cloudinary_service  # noqa: F401  configures the SDK
 load_dotenv()
 # --- Load environment variables ---
 BASE_URL = os.getenv("BASE_URL", "http://localhost")
 PORT = os.getenv("PORT")
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUD_NAME"),
-    api_key=os.getenv("CLOUD_API_KEY"),
-    api_secret=os.getenv("CLOUD_API_SECRET")
-)
-
 if PORT and f":{PORT}" not in BASE_URL:
     BASE_URL = f"{BASE_URL.rstrip('/')}:{PORT}"
 
@@ -0,0 +1,227 @@
+import re
+from math import radians, cos
+from typing import Optional, Tuple, Dict, Any, List
+
+from pymongo.errors import OperationFailure
+
+from services.distance_radius_calculator import rank_by_distance
+from utils.pagination.cursor_pagination import SortSpec, decode_cursor, keyset_filter, split_page
+
+# GeoJSON point stored on every ad, indexed with 2dsphere
+GEO_POINT_FIELD = "location.point"
+EARTH_RADIUS_KM = 6371.0
+
+# Keyset order for distance listings; _id breaks ties between ads at the same spot
+NEAREST_FIRST: SortSpec = [("distance", 1), ("_id", 1)]
+
+# Everything resolve_coordinates may read, for projections used by the in-process fallback
+COORDINATE_FIELDS = [
+    "location.lat", "location.lon", "location.lng", "location.latitude", "location.longitude",
+    "location.googleMapLocation",
+]
+
+
+def extract_lat_lon_from_string(location_str: Optional[str]):
+    """
+    Extracts lat, lon from a coordinate string like '6.9271,79.8612' or a full map URL.
+    """
+    if not location_str:
+        return None, None
+    match = re.search(r'([-+]?[0-9]*\.?[0-9]+)[,\s]+([-+]?[0-9]*\.?[0-9]+)', location_str)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    return None, None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_coordinates(location: Optional[Dict[str, Any]]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Returns (lat, lng) for a location sub-document.
+    Explicit lat/lon (or lat/lng, latitude/longitude) win over the googleMapLocation string.
+    """
+    if not isinstance(location, dict):
+        return None, None
+
+    lat = _to_float(location.get("lat", location.get("latitude")))
+    lng = _to_float(location.get("lon", location.get("lng", location.get("longitude"))))
+
+    if (lat is None or lng is None) and location.get("googleMapLocation"):
+        lat, lng = extract_lat_lon_from_string(str(location["googleMapLocation"]))
+
+    if lat is None or lng is None:
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, None
+    return lat, lng
+
+
+def build_geo_point(location: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Builds the GeoJSON point for a location, or None when no usable coordinates exist."""
+    lat, lng = resolve_coordinates(location)
+    if lat is None:
+        return None
+    # GeoJSON order is [longitude, latitude]
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def with_geo_point(location: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Returns a copy of the location with `point` refreshed from its coordinates."""
+    if not isinstance(location, dict):
+        return location
+    location = {k: v for k, v in location.items() if k != "point"}
+    point = build_geo_point(location)
+    if point:
+        location["point"] = point
+    return location
+
+
+def geo_near_stage(
+        lat: float,
+        lng: float,
+        query: Optional[Dict[str, Any]] = None,
+        max_distance_km: Optional[float] = None,
+        distance_field: str = "distance",
+        min_distance_km: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    $geoNear stage against the ads 2dsphere index.
+    Results come back sorted by distance, with `distance_field` set in kilometers.
+    `min_distance_km` lets keyset pagination resume the scan where the previous page ended.
+    """
+    stage = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "key": GEO_POINT_FIELD,
+        "distanceField": distance_field,
+        "distanceMultiplier": 0.001,  # meters -> km
+        "spherical": True,
+        "query": query or {},
+    }
+    if max_distance_km is not None:
+        stage["maxDistance"] = max_distance_km * 1000  # km -> meters
+    if min_distance_km:
+        # minDistance is inclusive; back off 1mm so km<->m rounding can't drop ties
+        stage["minDistance"] = max(min_distance_km * 1000 - 0.001, 0)
+    return {"$geoNear": stage}
+
+
+def projection_with_distance(projection: Dict[str, int], distance_field: str = "distance") -> Dict[str, int]:
+    """Inclusion projections applied after $geoNear must keep the computed distance"""
+    if any(value for key, value in projection.items() if key != "_id"):
+        return {**projection, distance_field: 1}
+    return projection
+
+
+async def nearby_in_process(
+        collection,
+        lat: float,
+        lng: float,
+        query: Dict[str, Any],
+        max_distance_km: Optional[float] = None,
+        projection: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fallback for when $geoNear can't run (no 2dsphere index yet, points not backfilled).
+    Reads the matching documents once and scores them with one vectorized haversine pass.
+    Returns documents nearest first with `distance` (km) set, like $geoNear does.
+    """
+    if projection and any(value for key, value in projection.items() if key != "_id"):
+        projection = {**projection, **{field: 1 for field in COORDINATE_FIELDS}}
+    candidates = await collection.find(query, projection).to_list(length=None)
+
+    ranked = rank_by_distance(lat, lng, candidates, lambda doc: resolve_coordinates(doc.get("location")), max_distance_km)
+    for doc, distance in ranked:
+        doc["distance"] = distance
+    return [doc for doc, _ in ranked]
+
+
+async def geo_near_all(
+        collection,
+        lat: float,
+        lng: float,
+        query: Dict[str, Any],
+        max_distance_km: Optional[float] = None,
+        projection: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """Every match nearest first with `distance` in km; $geoNear when possible, otherwise in process"""
+    pipeline = [geo_near_stage(lat, lng, query, max_distance_km)]
+    if projection:
+        pipeline.append({"$project": projection_with_distance(projection)})
+    try:
+        return await collection.aggregate(pipeline).to_list(length=None)
+    except OperationFailure as e:
+        print(f"⚠️ $geoNear failed, ranking distances in process: {e}")
+        return await nearby_in_process(collection, lat, lng, query, max_distance_km, projection)
+
+
+async def geo_near_page(
+        collection,
+        lat: float,
+        lng: float,
+        query: Dict[str, Any],
+        after: Optional[str],
+        limit: int,
+        max_distance_km: Optional[float] = None,
+        projection: Optional[Dict[str, int]] = None
+):
+    """
+    One page of a $geoNear listing in (distance, _id) order. Returns (docs, next_cursor).
+
+    $geoNear emits documents by distance but leaves equal distances unordered, so a
+    window of 2 * limit + 1 documents is read and ordered by _id locally. Only if a
+    group of equal distances straddles the end of that window is the page re-read
+    with an explicit sort.
+    """
+    values = decode_cursor(after, NEAREST_FIRST) if after else None
+    stages = [geo_near_stage(lat, lng, query, max_distance_km, min_distance_km=values[0] if values else None)]
+    if values:
+        stages.append({"$match": keyset_filter(NEAREST_FIRST, values)})
+
+    project = [{"$project": projection_with_distance(projection)}] if projection else []
+
+    window = 2 * limit + 1
+    try:
+        docs = await collection.aggregate(stages + [{"$limit": window}] + project).to_list(length=window)
+    except OperationFailure as e:
+        print(f"⚠️ $geoNear failed, ranking distances in process: {e}")
+        docs = await nearby_in_process(collection, lat, lng, query, max_distance_km, projection)
+        if values:
+            last = tuple(values)
+            docs = [doc for doc in docs if (doc["distance"], doc["_id"]) > last]
+        docs.sort(key=lambda d: (d["distance"], d["_id"]))
+        return split_page(docs[:limit + 1], limit, NEAREST_FIRST)
+    docs.sort(key=lambda d: (d["distance"], d["_id"]))
+
+    if len(docs) == window and docs[limit]["distance"] == docs[-1]["distance"]:
+        docs = await collection.aggregate(
+            stages + [{"$sort": {"distance": 1, "_id": 1}}, {"$limit": limit + 1}] + project
+        ).to_list(length=limit + 1)
+
+    return split_page(docs[:limit + 1], limit, NEAREST_FIRST)
+
+
+def distance_expression(lat: float, lng: float, point_field: str = GEO_POINT_FIELD) -> Dict[str, Any]:
+    """
+    Aggregation expression for the haversine distance (km) from (lat, lng) to a document's point.
+    For pipelines that can't start with $geoNear (e.g. $text search). Null when the point is missing.
+    """
+    coordinates = f"${point_field}.coordinates"
+    return {"$let": {
+        "vars": {
+            "lat2": {"$degreesToRadians": {"$arrayElemAt": [coordinates, 1]}},
+            "lng2": {"$degreesToRadians": {"$arrayElemAt": [coordinates, 0]}},
+        },
+        "in": {"$multiply": [2 * EARTH_RADIUS_KM, {"$asin": {"$sqrt": {"$add": [
+            {"$pow": [{"$sin": {"$divide": [{"$subtract": ["$$lat2", radians(lat)]}, 2]}}, 2]},
+            {"$multiply": [
+                cos(radians(lat)),
+                {"$cos": "$$lat2"},
+                {"$pow": [{"$sin": {"$divide": [{"$subtract": ["$$lng2", radians(lng)]}, 2]}}, 2]},
+            ]},
+        ]}}}]},
+    }}
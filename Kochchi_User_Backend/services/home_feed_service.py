@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from cachetools import TTLCache
+
+from data_models.category_model import CategoryResponse
+from data_models.notification_model import Notification
+from data_models.popup_model import PopupAdOut
+from databases.mongo import db
+from services.ad_cache_service import TOP_PAGE_SIZE, fetch_ads_by_ids, new_shuffle_seed, shuffled_ad_set_ids
+from services.ad_sampler_service import CAROUSEL_QUERY, CAROUSEL_SIZE, sample_ads
+
+category_collection = db["categories"]
+notification_collection = db["notifications"]
+popup_ads_collection = db["popup_ads"]
+
+# Seconds each section of /feed/home may be served from memory. Writes drop the section on
+# the worker that made them (invalidate_home_feed); other workers catch up within the TTL.
+# The carousel pick is shared by everyone for its TTL.
+SECTION_TTLS = {
+    "carousel": 60,
+    "top": 120,
+    "popups": 300,
+    "notifications": 60,
+    "categories": 600,
+}
+
+
+async def load_carousel() -> List[Dict[str, Any]]:
+    return await sample_ads(CAROUSEL_QUERY, CAROUSEL_SIZE)
+
+
+async def load_top() -> Dict[str, Any]:
+    """Page 1 of /ads/top-full-ads; the seed lets the client fetch page 2 onwards in the same order"""
+    seed = new_shuffle_seed()
+    top_ids = await shuffled_ad_set_ids("top", seed)
+    ads = await fetch_ads_by_ids(top_ids[:TOP_PAGE_SIZE])
+    for ad in ads:
+        ad["ad_id"] = str(ad["_id"])
+    return {
+        "page": 1,
+        "seed": seed,
+        "total_pages": (len(top_ids) + TOP_PAGE_SIZE - 1) // TOP_PAGE_SIZE,
+        "total_ads": len(top_ids),
+        "results": ads,
+    }
+
+
+async def load_popups() -> List[Dict[str, Any]]:
+    popups = []
+    async for ad in popup_ads_collection.find().sort("createdAt", -1):
+        ad["adId"] = str(ad.pop("_id"))
+        popups.append(PopupAdOut(**ad).model_dump(mode="json"))
+    return popups
+
+
+async def load_notifications() -> List[Dict[str, Any]]:
+    notifications = []
+    async for notification in notification_collection.find().sort("createdAt", -1):
+        notification["id"] = str(notification.pop("_id"))
+        notifications.append(Notification(**notification).model_dump(mode="json"))
+    return notifications
+
+
+async def load_categories() -> List[Dict[str, Any]]:
+    categories = []
+    async for cat in category_collection.find():
+        cat["id"] = str(cat["_id"])
+        categories.append(CategoryResponse(**cat).model_dump(mode="json"))
+    return categories
+
+
+SECTION_LOADERS: Dict[str, Callable[[], Awaitable[Any]]] = {
+    "carousel": load_carousel,
+    "top": load_top,
+    "popups": load_popups,
+    "notifications": load_notifications,
+    "categories": load_categories,
+}
+
+_section_caches = {name: TTLCache(maxsize=1, ttl=ttl) for name, ttl in SECTION_TTLS.items()}
+_section_locks = {name: asyncio.Lock() for name in SECTION_LOADERS}
+
+
+async def get_section(name: str) -> Any:
+    cache = _section_caches[name]
+    value = cache.get(name)
+    if value is not None:
+        return value
+
+    async with _section_locks[name]:
+        # Concurrent misses wait for one load instead of each querying
+        value = cache.get(name)
+        if value is None:
+            value = cache[name] = await SECTION_LOADERS[name]()
+    return value
+
+
+async def home_feed() -> Dict[str, Any]:
+    """
+    All homepage sections, loaded concurrently. A failing section comes back as null
+    (and is retried on the next request) instead of failing the whole feed.
+    """
+    names = list(SECTION_LOADERS)
+    results = await asyncio.gather(*(get_section(name) for name in names), return_exceptions=True)
+
+    feed = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error loading home feed section {name}: {result}")
+            result = None
+        feed[name] = result
+    return feed
+
+
+def invalidate_home_feed(*names: str):
+    """Drops the named sections on this worker (all of them if none are given)"""
+    for name in names or SECTION_LOADERS:
+        _section_caches[name].clear()
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from databases.mongo import db
+
+# One document per (adId, userId, kind), unique-indexed.
+#   kind "vote":      value is "like" or "unlike" (a user can't hold both)
+#   kind "recommend": presence means the user recommended the ad
+#   A cleared vote leaves the document in place without a value.
+# Totals stay on the ad (reactions.likes.count, reactions.unlikes.count, recommendations.count)
+# so ad reads never touch this collection.
+ad_reactions_collection = db["ad_reactions"]
+ads_collection = db["ads"]
+
+VOTE = "vote"
+RECOMMEND = "recommend"
+
+COUNTER_FIELDS = {
+    "like": "reactions.likes.count",
+    "unlike": "reactions.unlikes.count",
+    RECOMMEND: "recommendations.count",
+}
+COUNTS_PROJECTION = {"_id": 0, "reactions.likes.count": 1, "reactions.unlikes.count": 1, "recommendations.count": 1}
+
+
+def _key(ad_id: ObjectId, user_id: str, kind: str) -> Dict[str, Any]:
+    return {"adId": ad_id, "userId": user_id, "kind": kind}
+
+
+def _counts(ad: Dict[str, Any]) -> Dict[str, int]:
+    reactions = ad.get("reactions") or {}
+    return {
+        "likes": (reactions.get("likes") or {}).get("count", 0),
+        "unlikes": (reactions.get("unlikes") or {}).get("count", 0),
+        "recommendations": (ad.get("recommendations") or {}).get("count", 0),
+    }
+
+
+async def _apply_counters(ad_id: ObjectId, counters: Dict[str, int]) -> Optional[Dict[str, int]]:
+    """$inc the ad counters and return the new totals in the same round trip (None if the ad is gone)"""
+    ad = await ads_collection.find_one_and_update(
+        {"_id": ad_id},
+        {"$inc": counters},
+        projection=COUNTS_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    return _counts(ad) if ad else None
+
+
+async def _flip_vote(key: Dict[str, Any], value: str) -> Optional[Dict[str, Any]]:
+    """
+    Atomically sets the vote to `value`, or clears it if it already is `value`.
+    Returns the document as it was before, so concurrent clicks each see their own transition.
+    """
+    update = [{"$set": {
+        "value": {"$cond": [{"$eq": ["$value", value]}, "$$REMOVE", value]},
+        "updatedAt": datetime.utcnow(),
+    }}]
+    for attempt in range(2):
+        try:
+            return await ad_reactions_collection.find_one_and_update(
+                key, update, upsert=True, projection={"value": 1}, return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Two first-time upserts raced on the unique index; the retry sees the winner's document
+            if attempt:
+                raise
+
+
+async def toggle_vote(ad_id: ObjectId, user_id: str, value: str) -> Optional[Dict[str, Any]]:
+    """
+    Toggles a like/unlike vote: one conditional update on the reaction, one $inc on the ad.
+    Returns {"state": "like" | "unlike" | None, "counts": {...}}, or None if the ad doesn't exist.
+    """
+    key = _key(ad_id, user_id, VOTE)
+    before = await _flip_vote(key, value)
+    previous = before.get("value") if before else None
+
+    if previous == value:
+        counters = {COUNTER_FIELDS[value]: -1}
+        state = None
+    else:
+        counters = {COUNTER_FIELDS[value]: 1}
+        if previous:
+            counters[COUNTER_FIELDS[previous]] = -1
+        state = value
+
+    counts = await _apply_counters(ad_id, counters)
+    if counts is None:
+        await ad_reactions_collection.delete_one(key)
+        return None
+    return {"state": state, "counts": counts}
+
+
+async def add_recommendation(ad_id: ObjectId, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Records a recommendation.
+    Returns {"state": "recommended", "counts": {...}}, {"state": "already_recommended"} for repeats,
+    or None if the ad doesn't exist.
+    """
+    key = _key(ad_id, user_id, RECOMMEND)
+    try:
+        await ad_reactions_collection.insert_one({**key, "updatedAt": datetime.utcnow()})
+    except DuplicateKeyError:
+        return {"state": "already_recommended"}
+
+    counts = await _apply_counters(ad_id, {COUNTER_FIELDS[RECOMMEND]: 1})
+    if counts is None:
+        await ad_reactions_collection.delete_one(key)
+        return None
+    return {"state": "recommended", "counts": counts}
+
+
+async def get_user_reactions(ad_id: ObjectId, user_id: str) -> Dict[str, Any]:
+    vote = None
+    recommended = False
+    async for reaction in ad_reactions_collection.find({"adId": ad_id, "userId": user_id}):
+        if reaction["kind"] == VOTE:
+            vote = reaction.get("value")
+        elif reaction["kind"] == RECOMMEND:
+            recommended = True
+    return {"vote": vote, "recommended": recommended}
+
+
+async def delete_ad_reactions(ad_id: ObjectId):
+    await ad_reactions_collection.delete_many({"adId": ad_id})
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from datetime import datetime
+from math import cos, radians, floor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from databases.mongo import db
+from services.distance_radius_calculator import batch_distances
+from services.geo_service import resolve_coordinates
+
+ads_collection = db["ads"]
+dansal_collection = db["dansal"]
+
+# 0.1 degree cells are ~11 km across in Sri Lanka; a 10 km radius touches at most 3x3 cells
+CELL_DEGREES = 0.1
+KM_PER_DEGREE = 111.32
+# Upper bound for radius query params: covers all of Sri Lanka (~430 km end to end)
+MAX_RADIUS_KM = 500
+
+# Each worker keeps its own copy; writes on other workers are picked up by the next rebuild
+INDEX_MAX_AGE_SECONDS = 600
+
+Cell = Tuple[int, int]
+
+
+class GridSpatialIndex:
+    """
+    Fixed-grid bucket index of points keyed by document _id.
+    Radius queries only score the points in the cells overlapping the search box.
+    """
+
+    def __init__(self, name: str, cell_degrees: float = CELL_DEGREES):
+        self.name = name
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Cell, Dict[ObjectId, Tuple[float, float, Dict[str, Any]]]] = {}
+        self.cell_of: Dict[ObjectId, Cell] = {}
+        self.rebuilt_at: Optional[datetime] = None
+        self.rebuild_seconds: Optional[float] = None
+        self._rebuilt_monotonic: Optional[float] = None
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return floor(lat / self.cell_degrees), floor(lng / self.cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self.cell_of)
+
+    def upsert(self, _id: ObjectId, lat: float, lng: float, meta: Optional[Dict[str, Any]] = None):
+        self.remove(_id)
+        cell = self._cell(lat, lng)
+        self.cells.setdefault(cell, {})[_id] = (lat, lng, meta or {})
+        self.cell_of[_id] = cell
+
+    def remove(self, _id: ObjectId):
+        cell = self.cell_of.pop(_id, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.pop(_id, None)
+        if not bucket:
+            del self.cells[cell]
+
+    def replace_all(self, entries: List[Tuple[ObjectId, float, float, Dict[str, Any]]], seconds: float):
+        self.cells = {}
+        self.cell_of = {}
+        for _id, lat, lng, meta in entries:
+            self.upsert(_id, lat, lng, meta)
+        self.rebuilt_at = datetime.utcnow()
+        self.rebuild_seconds = seconds
+        self._rebuilt_monotonic = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return self._rebuilt_monotonic is None or time.monotonic() - self._rebuilt_monotonic > INDEX_MAX_AGE_SECONDS
+
+    def query_radius(
+            self,
+            lat: float,
+            lng: float,
+            radius_km: float,
+            where: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Tuple[ObjectId, float]]:
+        """(_id, km) pairs within radius_km, nearest first"""
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(cos(radians(lat)), 0.01))
+        low_i, low_j = self._cell(lat - lat_span, lng - lng_span)
+        high_i, high_j = self._cell(lat + lat_span, lng + lng_span)
+
+        # A box with more cells than are occupied is cheaper to answer from the occupied cells
+        if (high_i - low_i + 1) * (high_j - low_j + 1) > len(self.cells):
+            buckets = [
+                bucket for (i, j), bucket in self.cells.items()
+                if low_i <= i <= high_i and low_j <= j <= high_j
+            ]
+        else:
+            buckets = [
+                self.cells[(i, j)]
+                for i in range(low_i, high_i + 1) for j in range(low_j, high_j + 1)
+                if (i, j) in self.cells
+            ]
+
+        ids, lats, lngs = [], [], []
+        for bucket in buckets:
+            for _id, (point_lat, point_lng, meta) in bucket.items():
+                if where is None or where(meta):
+                    ids.append(_id)
+                    lats.append(point_lat)
+                    lngs.append(point_lng)
+
+        if not ids:
+            return []
+
+        distances = batch_distances(lat, lng, lats, lngs)
+        hits = sorted((distance, _id) for _id, distance in zip(ids, distances.tolist()) if distance <= radius_km)
+        return [(_id, distance) for distance, _id in hits]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self),
+            "cells": len(self.cells),
+            "cell_degrees": self.cell_degrees,
+            "rebuilt_at": self.rebuilt_at,
+            "rebuild_seconds": self.rebuild_seconds,
+        }
+
+
+ads_spatial_index = GridSpatialIndex("ads")
+dansal_spatial_index = GridSpatialIndex("dansal")
+_rebuild_locks = {"ads": asyncio.Lock(), "dansal": asyncio.Lock()}
+
+# Visible ads only; the category is kept so category-scoped lookups skip other ads
+AD_INDEX_QUERY = {"visibility": "visible"}
+AD_INDEX_PROJECTION = {"location": 1, "business.category": 1, "visibility": 1}
+
+
+def _ad_meta(ad: Dict[str, Any]) -> Dict[str, Any]:
+    return {"category": (ad.get("business") or {}).get("category")}
+
+
+async def _load(collection, query, projection, meta_of) -> List[Tuple[ObjectId, float, float, Dict[str, Any]]]:
+    entries = []
+    async for doc in collection.find(query, projection):
+        lat, lng = resolve_coordinates(doc.get("location"))
+        if lat is not None:
+            entries.append((doc["_id"], lat, lng, meta_of(doc)))
+    return entries
+
+
+async def rebuild_ads_index():
+    started = time.perf_counter()
+    entries = await _load(ads_collection, AD_INDEX_QUERY, AD_INDEX_PROJECTION, _ad_meta)
+    ads_spatial_index.replace_all(entries, time.perf_counter() - started)
+
+
+async def rebuild_dansal_index():
+    started = time.perf_counter()
+    entries = await _load(dansal_collection, {}, {"location": 1}, lambda doc: {})
+    dansal_spatial_index.replace_all(entries, time.perf_counter() - started)
+
+
+async def rebuild_spatial_indexes():
+    try:
+        await rebuild_ads_index()
+        await rebuild_dansal_index()
+        print(f"🗺️ Spatial indexes built: {len(ads_spatial_index)} ads, {len(dansal_spatial_index)} dansals")
+    except Exception as e:
+        print(f"❌ Error building spatial indexes: {e}")
+
+
+async def _ensure_fresh(index: GridSpatialIndex, rebuild):
+    if not index.is_stale():
+        return
+    async with _rebuild_locks[index.name]:
+        # Concurrent lookups wait for one rebuild instead of each scanning the collection
+        if index.is_stale():
+            await rebuild()
+
+
+async def nearby_ad_ids(lat: float, lng: float, radius_km: float, category: Optional[str] = None):
+    await _ensure_fresh(ads_spatial_index, rebuild_ads_index)
+    where = (lambda meta: meta.get("category") == category) if category else None
+    return ads_spatial_index.query_radius(lat, lng, radius_km, where)
+
+
+async def nearby_dansal_ids(lat: float, lng: float, radius_km: float):
+    await _ensure_fresh(dansal_spatial_index, rebuild_dansal_index)
+    return dansal_spatial_index.query_radius(lat, lng, radius_km)
+
+
+async def refresh_ad_location(ad_id: ObjectId):
+    """Re-reads one ad after a write and adds, moves or drops it in the index"""
+    ad = await ads_collection.find_one({"_id": ad_id, **AD_INDEX_QUERY}, AD_INDEX_PROJECTION)
+    lat, lng = resolve_coordinates(ad.get("location")) if ad else (None, None)
+    if lat is None:
+        ads_spatial_index.remove(ad_id)
+    else:
+        ads_spatial_index.upsert(ad_id, lat, lng, _ad_meta(ad))
+
+
+def drop_ad_location(ad_id: ObjectId):
+    ads_spatial_index.remove(ad_id)
+
+
+def index_dansal_location(dansal_id: ObjectId, location: Optional[Dict[str, Any]]):
+    lat, lng = resolve_coordinates(location)
+    if lat is not None:
+        dansal_spatial_index.upsert(dansal_id, lat, lng)
+
+
+def drop_dansal_location(dansal_id: ObjectId):
+    dansal_spatial_index.remove(dansal_id)
+
+
+def spatial_index_stats() -> Dict[str, Any]:
+    return {
+        "ads": ads_spatial_index.stats(),
+        "dansal": dansal_spatial_index.stats(),
+    }
@@ -0,0 +1,319 @@
+import asyncio
+import heapq
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from cachetools import LRUCache
+
+from databases.mongo import db
+from services.ad_keys_service import normalize_key
+
+ads_collection = db["ads"]
+category_collection = db["categories"]
+
+SUGGEST_KINDS = ("shop", "city", "district", "category")
+
+# Each worker keeps its own copy; writes on other workers are picked up by the next rebuild,
+# which runs in the background while the previous index keeps serving
+INDEX_MAX_AGE_SECONDS = 600
+# Upper bound on prefix matches scored per lookup, so one-letter prefixes stay cheap
+MAX_PREFIX_MATCHES = 5000
+# Typed prefixes repeat a lot; results are kept per prefix until a term under it changes
+RESULT_CACHE_SIZE = 2048
+DEFAULT_SUGGEST_LIMIT = 8
+
+# Only what the public listings show
+AD_INDEX_QUERY = {"visibility": "visible", "approval.status": "approved"}
+AD_INDEX_PROJECTION = {
+    "shopName": 1,
+    "location.city": 1,
+    "location.district": 1,
+    "categoryKey": 1,
+    "reactions.likes.count": 1,
+    "recommendations.count": 1,
+}
+
+TermKey = Tuple[str, str]  # (kind, normalized text)
+
+
+class Term:
+    __slots__ = ("kind", "label", "ads", "popularity")
+
+    def __init__(self, kind: str, label: str):
+        self.kind = kind
+        self.label = label
+        # ad _id -> popularity (likes + recommendations) of each ad behind this term
+        self.ads: Dict[ObjectId, int] = {}
+        self.popularity = 0
+
+    def add(self, ad_id: ObjectId, popularity: int):
+        self.popularity += popularity - self.ads.get(ad_id, 0)
+        self.ads[ad_id] = popularity
+
+    def discard(self, ad_id: ObjectId):
+        self.popularity -= self.ads.pop(ad_id, 0)
+
+    def rank(self) -> Tuple[int, int]:
+        return self.popularity, len(self.ads)
+
+
+class PrefixIndex:
+    """
+    Sorted array of (word-start fragment, term) pairs searched with bisect.
+    Every word of a term is a fragment start, so "piz" finds "Mario's Pizza" too.
+    Ads add their popularity to their shop, city, district and category terms;
+    a term with no ads left is removed (categories from `categories` stay).
+    """
+
+    def __init__(self):
+        self.terms: Dict[TermKey, Term] = {}
+        self.fragments: List[Tuple[str, TermKey]] = []
+        self.terms_of: Dict[ObjectId, List[TermKey]] = {}
+        self.rebuilt_at: Optional[datetime] = None
+        self.rebuild_seconds: Optional[float] = None
+        self._rebuilt_monotonic: Optional[float] = None
+        self._pinned: set = set()
+        # While building, fragments are appended and sorted once at the end instead of insort-ed
+        self._bulk = False
+        # prefix -> {(kind, limit): suggestions}; a change to a term drops only its own prefixes
+        self._results: LRUCache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+
+    @staticmethod
+    def _fragments(key: str) -> List[str]:
+        words = key.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def _term(self, kind: str, label: Any) -> Optional[TermKey]:
+        key = normalize_key(label)
+        if not key:
+            return None
+        term_key = (kind, key)
+        if term_key not in self.terms:
+            self.terms[term_key] = Term(kind, str(label).strip())
+            for fragment in self._fragments(key):
+                if self._bulk:
+                    self.fragments.append((fragment, term_key))
+                else:
+                    insort(self.fragments, (fragment, term_key))
+        return term_key
+
+    def _drop_term(self, term_key: TermKey):
+        del self.terms[term_key]
+        for fragment in self._fragments(term_key[1]):
+            position = bisect_left(self.fragments, (fragment, term_key))
+            if position < len(self.fragments) and self.fragments[position] == (fragment, term_key):
+                del self.fragments[position]
+
+    def add_category(self, name: Any):
+        term_key = self._term("category", name)
+        if term_key:
+            self._pinned.add(term_key)
+
+    def upsert_ad(self, ad: Dict[str, Any]):
+        self.remove_ad(ad["_id"])
+        location = ad.get("location") or {}
+        popularity = (
+            ((ad.get("reactions") or {}).get("likes") or {}).get("count", 0)
+            + (ad.get("recommendations") or {}).get("count", 0)
+        )
+
+        term_keys = [
+            self._term("shop", ad.get("shopName")),
+            self._term("city", location.get("city")),
+            self._term("district", location.get("district")),
+        ]
+        # Ads only feed categories that exist in `categories`, under the category's own name
+        category = ("category", ad.get("categoryKey"))
+        if category in self.terms:
+            term_keys.append(category)
+
+        term_keys = [term_key for term_key in term_keys if term_key]
+        for term_key in term_keys:
+            self.terms[term_key].add(ad["_id"], popularity)
+        self.terms_of[ad["_id"]] = term_keys
+        self._forget_results(term_keys)
+
+    def set_popularity(self, ad_id: ObjectId, popularity: int):
+        """New likes + recommendations for an indexed ad; ads not in the index are ignored"""
+        term_keys = self.terms_of.get(ad_id, [])
+        for term_key in term_keys:
+            self.terms[term_key].add(ad_id, popularity)
+        self._forget_results(term_keys)
+
+    def _forget_results(self, term_keys: List[TermKey]):
+        """Drops the cached results of every prefix that can match these terms"""
+        if self._bulk or not self._results:
+            return
+        for _, key in term_keys:
+            for fragment in self._fragments(key):
+                for end in range(1, len(fragment) + 1):
+                    self._results.pop(fragment[:end], None)
+
+    def remove_ad(self, ad_id: ObjectId):
+        self._forget_results(self.terms_of.get(ad_id, []))
+        for term_key in self.terms_of.pop(ad_id, []):
+            term = self.terms.get(term_key)
+            if term is None:
+                continue
+            term.discard(ad_id)
+            if not term.ads and term_key not in self._pinned:
+                self._drop_term(term_key)
+
+    @classmethod
+    def build(cls, category_names: List[Any], ads: List[Dict[str, Any]]) -> "PrefixIndex":
+        """A complete index in O(F log F): one sort of all fragments, then the one-letter prefixes warmed"""
+        index = cls()
+        index._bulk = True
+        for name in category_names:
+            index.add_category(name)
+        for ad in ads:
+            index.upsert_ad(ad)
+        index._bulk = False
+        index.fragments.sort()
+
+        for initial in sorted({fragment[0] for fragment, _ in index.fragments}):
+            index.search(initial, DEFAULT_SUGGEST_LIMIT)
+        index.rebuilt_at = datetime.utcnow()
+        index._rebuilt_monotonic = time.monotonic()
+        return index
+
+    def mark_stale(self):
+        self._rebuilt_monotonic = None
+
+    def is_stale(self) -> bool:
+        return self._rebuilt_monotonic is None or time.monotonic() - self._rebuilt_monotonic > INDEX_MAX_AGE_SECONDS
+
+    def search(self, prefix: str, limit: int, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top `limit` terms with a word starting with `prefix`, most popular first"""
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+
+        cached = self._results.get(prefix)
+        if cached is None:
+            cached = self._results[prefix] = {}
+        suggestions = cached.get((kind, limit))
+        if suggestions is None:
+            suggestions = cached[(kind, limit)] = self._search(prefix, limit, kind)
+        return suggestions
+
+    def _search(self, prefix: str, limit: int, kind: Optional[str]) -> List[Dict[str, Any]]:
+        matched = set()
+        start = bisect_left(self.fragments, (prefix,))
+        for position in range(start, min(start + MAX_PREFIX_MATCHES, len(self.fragments))):
+            fragment, term_key = self.fragments[position]
+            if not fragment.startswith(prefix):
+                break
+            if kind is None or term_key[0] == kind:
+                matched.add(term_key)
+
+        best = heapq.nlargest(limit, matched, key=lambda term_key: (self.terms[term_key].rank(), term_key))
+        suggestions = []
+        for term_key in best:
+            term = self.terms[term_key]
+            popularity, ad_count = term.rank()
+            suggestion = {"text": term.label, "kind": term.kind, "popularity": popularity, "ads": ad_count}
+            if term.kind == "shop" and ad_count == 1:
+                suggestion["ad_id"] = str(next(iter(term.ads)))
+            suggestions.append(suggestion)
+        return suggestions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "terms": len(self.terms),
+            "fragments": len(self.fragments),
+            "ads": len(self.terms_of),
+            "rebuilt_at": self.rebuilt_at,
+            "rebuild_seconds": self.rebuild_seconds,
+        }
+
+
+# Swapped for a freshly built index on every rebuild; always read it through this module
+suggest_index = PrefixIndex()
+_rebuild_task: Optional[asyncio.Task] = None
+# Incremental changes made while a rebuild is reading, replayed onto the new index before the swap
+_pending: Optional[List[Tuple[str, tuple]]] = None
+
+
+def _apply(method: str, *args):
+    getattr(suggest_index, method)(*args)
+    if _pending is not None:
+        _pending.append((method, args))
+
+
+async def rebuild_suggest_index():
+    global suggest_index, _pending
+    started = time.perf_counter()
+    _pending = []
+    try:
+        category_names = [doc.get("name") async for doc in category_collection.find({}, {"name": 1})]
+        ads = [ad async for ad in ads_collection.find(AD_INDEX_QUERY, AD_INDEX_PROJECTION)]
+        # Building is pure CPU; a thread keeps the event loop (and the old index) serving meanwhile
+        index = await asyncio.to_thread(PrefixIndex.build, category_names, ads)
+        index.rebuild_seconds = time.perf_counter() - started
+        for method, args in _pending:
+            getattr(index, method)(*args)
+        suggest_index = index
+    finally:
+        _pending = None
+
+
+def _start_rebuild() -> asyncio.Task:
+    """The running rebuild, or a new one; concurrent callers share it"""
+    global _rebuild_task
+    if _rebuild_task is None or _rebuild_task.done():
+        _rebuild_task = asyncio.create_task(rebuild_suggest_index())
+        _rebuild_task.add_done_callback(_log_rebuild_failure)
+    return _rebuild_task
+
+
+def _log_rebuild_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"❌ Error rebuilding suggest index: {task.exception()}")
+
+
+async def build_suggest_index():
+    try:
+        await _start_rebuild()
+        print(f"🔤 Suggest index built: {len(suggest_index.terms)} terms")
+    except Exception as e:
+        print(f"❌ Error building suggest index: {e}")
+
+
+async def suggest(prefix: str, limit: int, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    if suggest_index.is_stale():
+        rebuild = _start_rebuild()
+        if suggest_index.rebuilt_at is None:
+            # Nothing built yet (startup build failed): this lookup has to wait for one
+            await rebuild
+    return suggest_index.search(prefix, limit, kind)
+
+
+async def refresh_ad_suggestions(ad_id: ObjectId):
+    """Re-reads one ad after a write and adds, updates or drops its terms"""
+    ad = await ads_collection.find_one({"_id": ad_id, **AD_INDEX_QUERY}, AD_INDEX_PROJECTION)
+    if ad:
+        _apply("upsert_ad", ad)
+    else:
+        _apply("remove_ad", ad_id)
+
+
+def update_ad_popularity(ad_id: ObjectId, counts: Dict[str, int]):
+    """Applies the counters a reaction returned (see reaction_service), without re-reading the ad"""
+    _apply("set_popularity", ad_id, counts.get("likes", 0) + counts.get("recommendations", 0))
+
+
+def drop_ad_suggestions(ad_id: ObjectId):
+    _apply("remove_ad", ad_id)
+
+
+def invalidate_suggestions():
+    """Category writes rebuild the whole index in the background; there are only a handful"""
+    _apply("mark_stale")
+
+
+def suggest_index_stats() -> Dict[str, Any]:
+    return suggest_index.stats()
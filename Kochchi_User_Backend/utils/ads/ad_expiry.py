@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+# Ads that are neither top nor carousel ads are removed this long after creation
+AD_RETENTION_DAYS = 31
+# expire_ads.py deletes ads at purgeAt (with their images, at a throttled rate); the TTL
+# index only removes what the job hasn't reached this long afterwards
+AD_TTL_GRACE_SECONDS = 2 * 24 * 3600
+
+
+def compute_purge_at(ad: Dict[str, Any]) -> Optional[datetime]:
+    """
+    When the ad should be deleted, stored as purgeAt. expire_ads.py deletes it from then on,
+    and the purgeAt TTL index is the backstop AD_TTL_GRACE_SECONDS later.
+    Top and carousel ads are exempt (None, which the TTL monitor ignores). Like the old
+    cleanup query, only an explicit False on both flags makes an ad expire.
+    Recomputed on create, when adSettings change, and by `migrate_ads.py purge_at`.
+    """
+    settings = ad.get("adSettings") or {}
+    created_at = ad.get("createdAt")
+    if settings.get("isTopAd") is not False or settings.get("isCarousalAd") is not False:
+        return None
+    if not isinstance(created_at, datetime):
+        return None
+    return created_at + timedelta(days=AD_RETENTION_DAYS)
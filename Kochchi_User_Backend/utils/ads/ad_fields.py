@@ -0,0 +1,144 @@
+from typing import Optional, Dict, Any, List, NamedTuple
+
+from fastapi import HTTPException
+
+# Top-level ad fields a client may ask for with ?fields=
+SELECTABLE_ROOTS = {
+    "shopName", "contact", "location", "business", "schedule", "adSettings", "images", "videoUrl",
+    "approval", "reactions", "recommendations", "visibility", "expiryDate", "createdAt", "updatedAt",
+    "userId", "stripeSessionId", "priority_score",
+    "categoryKey", "cityKey", "openIntervals", "purgeAt",
+}
+
+# Legacy embedded reaction arrays (moved to ad_reactions by `migrate_ads.py reactions`);
+# never sent unless explicitly requested
+UNBOUNDED_FIELDS = ["reactions.likes.userIds", "reactions.unlikes.userIds", "recommendations.userIds"]
+
+FIELD_PROFILES: Dict[str, Dict[str, int]] = {
+    # Listing cards
+    "card": {path: 1 for path in [
+        "shopName", "images", "contact",
+        "location.googleMapLocation", "location.city", "location.district", "location.province",
+        "location.country", "location.state",
+        "business.category", "business.specialty", "business.tags", "business.halalAvailable",
+        "business.description",
+        "schedule", "adSettings", "approval.status",
+        "reactions.likes.count", "reactions.unlikes.count", "recommendations.count",
+        "visibility", "expiryDate", "createdAt", "updatedAt",
+    ]},
+    # Ad details page: the whole ad apart from the unbounded arrays and payment internals
+    "detail": {path: 0 for path in UNBOUNDED_FIELDS + ["stripeSessionId"]},
+    # Admin screens: everything apart from the unbounded arrays
+    "admin": {path: 0 for path in UNBOUNDED_FIELDS},
+}
+
+class FlatField(NamedTuple):
+    key: str                       # key in the flattened listing item
+    source: Optional[str]          # dotted path on the ad document (None for constants)
+    default: Any = None            # used when the source field is missing
+    transform: Optional[str] = None  # "str" or "first" (first array element)
+
+
+# The flattened listing item shared by /ads/filter, /ads/approve and /ads/rejected.
+# utils/ads/ad_flatten.py compiles this table into the per-ad function and the $project stage.
+FLAT_FIELDS: List[FlatField] = [
+    FlatField("ad_id", "_id", transform="str"),
+    FlatField("title", "shopName", "Untitled Ad"),
+    FlatField("image_url", "images", transform="first"),
+    FlatField("priority_score", None, 0),
+    FlatField("shopName", "shopName", ""),
+
+    # Contact
+    FlatField("contact_address", "contact.address", ""),
+    FlatField("contact_phone", "contact.phone", ""),
+    FlatField("contact_whatsapp", "contact.whatsapp"),
+    FlatField("contact_email", "contact.email"),
+    FlatField("contact_website", "contact.website"),
+
+    # Location
+    FlatField("location_googleMapLocation", "location.googleMapLocation"),
+    FlatField("location_city", "location.city", ""),
+    FlatField("location_district", "location.district", ""),
+    FlatField("location_province", "location.province"),
+    FlatField("location_country", "location.country", "Sri Lanka"),
+    FlatField("location_state", "location.state"),
+
+    # Business
+    FlatField("business_category", "business.category", ""),
+    FlatField("business_specialty", "business.specialty"),
+    FlatField("business_tags", "business.tags", []),
+    FlatField("business_halalAvailable", "business.halalAvailable", False),
+    FlatField("business_description", "business.description"),
+    FlatField("business_menuOptions", "business.menuOptions", []),
+
+    # Schedule
+    FlatField("schedule_mon", "schedule.mon", []),
+    FlatField("schedule_tue", "schedule.tue", []),
+    FlatField("schedule_wed", "schedule.wed", []),
+    FlatField("schedule_thu", "schedule.thu", []),
+    FlatField("schedule_fri", "schedule.fri", []),
+    FlatField("schedule_sat", "schedule.sat", []),
+    FlatField("schedule_sun", "schedule.sun", []),
+
+    # AdSettings
+    FlatField("isTopAd", "adSettings.isTopAd", False),
+    FlatField("isCarousalAd", "adSettings.isCarousalAd", False),
+    FlatField("hasHalal", "adSettings.hasHalal", False),
+
+    # Media
+    FlatField("images", "images", []),
+    FlatField("videoUrl", "videoUrl"),
+
+    # Approval
+    FlatField("approval_status", "approval.status", ""),
+    FlatField("approval_adminId", "approval.adminId"),
+    FlatField("approval_adminComment", "approval.adminComment"),
+    FlatField("approval_approvedAt", "approval.approvedAt"),
+
+    # Reactions
+    FlatField("likes_count", "reactions.likes.count", 0),
+    FlatField("unlikes_count", "reactions.unlikes.count", 0),
+
+    # Recommendations
+    FlatField("recommendations_count", "recommendations.count", 0),
+
+    FlatField("visibility", "visibility", ""),
+    FlatField("expiryDate", "expiryDate"),
+    FlatField("createdAt", "createdAt"),
+    FlatField("updatedAt", "updatedAt"),
+]
+
+# Flattened listing key -> source path on the ad document (_id always survives projections)
+FLAT_FIELD_SOURCES = {field.key: field.source for field in FLAT_FIELDS if field.source and field.source != "_id"}
+
+
+def resolve_projection(fields: Optional[str], default_profile: str) -> Dict[str, int]:
+    """
+    Turns ?fields= into a Mongo projection.
+    Accepts a profile name (card, detail, admin) or a comma-separated list of dotted paths.
+    """
+    fields = (fields or default_profile).strip()
+    if fields in FIELD_PROFILES:
+        return dict(FIELD_PROFILES[fields])
+
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+    invalid = [path for path in paths if path.split(".")[0] not in SELECTABLE_ROOTS]
+    if not paths or invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields: {', '.join(invalid) or fields}. "
+                   f"Use a profile ({', '.join(FIELD_PROFILES)}) or dotted paths under: {', '.join(sorted(SELECTABLE_ROOTS))}"
+        )
+    return {path: 1 for path in paths}
+
+
+def is_inclusion(projection: Dict[str, int]) -> bool:
+    return any(value for key, value in projection.items() if key != "_id")
+
+
+def includes(projection: Optional[Dict[str, int]], path: str) -> bool:
+    """Whether `path` survives the projection"""
+    if not projection:
+        return True
+    covered = any(path == key or path.startswith(key + ".") for key in projection if key != "_id")
+    return covered if is_inclusion(projection) else not covered
@@ -0,0 +1,102 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from utils.ads.ad_fields import FLAT_FIELDS, FLAT_FIELD_SOURCES, FlatField, includes
+
+Flattener = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_EMPTY: Dict[str, Any] = {}
+
+# One compiled function per distinct projection; ?fields= combinations are user-chosen, so bound it
+_flatteners: LRUCache = LRUCache(maxsize=64)
+
+
+def _first(value):
+    return value[0] if value else None
+
+
+def _selected(projection: Optional[Dict[str, int]]) -> List[FlatField]:
+    """Fields whose source survives the projection (constants and ad_id always do)"""
+    return [
+        field for field in FLAT_FIELDS
+        if field.key not in FLAT_FIELD_SOURCES or includes(projection, field.source)
+    ]
+
+
+def _compile(fields: List[FlatField]) -> Flattener:
+    """
+    Generates one straight-line function for `fields`: every sub-document is looked up once,
+    and the result is a single dict literal. Only the static FLAT_FIELDS table reaches the
+    generated source; request input just picks which entries are included.
+    """
+    body = []
+    containers = {(): "ad"}
+
+    def container(parts: Tuple[str, ...]) -> str:
+        if parts not in containers:
+            parent = container(parts[:-1])
+            name = "_" + "_".join(parts)
+            body.append(f"    {name} = {parent}.get({parts[-1]!r})")
+            body.append(f"    if not isinstance({name}, dict): {name} = _EMPTY")
+            containers[parts] = name
+        return containers[parts]
+
+    items = []
+    for field in fields:
+        if field.source is None:
+            expression = repr(field.default)
+        else:
+            *path, leaf = field.source.split(".")
+            source = container(tuple(path))
+            if field.transform == "str":
+                expression = f"str({source}[{leaf!r}])"
+            elif field.transform == "first":
+                expression = f"_first({source}.get({leaf!r}))"
+            else:
+                expression = f"{source}.get({leaf!r}, {field.default!r})"
+        items.append(f"        {field.key!r}: {expression},")
+
+    source_code = "\n".join(["def flatten(ad):", *body, "    return {", *items, "    }"])
+    namespace = {"_EMPTY": _EMPTY, "_first": _first}
+    exec(compile(source_code, "<ad_flatten>", "exec"), namespace)
+    return namespace["flatten"]
+
+
+def flattener(projection: Optional[Dict[str, int]] = None) -> Flattener:
+    """The compiled ad -> flattened listing item function for a projection"""
+    key = tuple(sorted(projection.items())) if projection else ()
+    function = _flatteners.get(key)
+    if function is None:
+        function = _flatteners[key] = _compile(_selected(projection))
+    return function
+
+
+def flat_keys(projection: Optional[Dict[str, int]] = None) -> List[str]:
+    """Keys of the flattened item for a projection, in output order (e.g. CSV columns)"""
+    return [field.key for field in _selected(projection)]
+
+
+def flat_project_stage(
+        projection: Optional[Dict[str, int]] = None,
+        overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    The same flattening as a $project stage, for listings that let Mongo build the items.
+    `overrides` replaces the expression of individual keys (e.g. a listing's priority_score).
+    Unlike dict.get defaults, $ifNull also replaces explicit nulls with the default.
+    """
+    stage: Dict[str, Any] = {"_id": 0}
+    for field in _selected(projection):
+        if field.source is None:
+            stage[field.key] = {"$literal": field.default}
+        elif field.transform == "str":
+            stage[field.key] = {"$toString": f"${field.source}"}
+        elif field.transform == "first":
+            stage[field.key] = {"$ifNull": [{"$arrayElemAt": [f"${field.source}", 0]}, None]}
+        else:
+            stage[field.key] = {"$ifNull": [f"${field.source}", {"$literal": field.default}]}
+    for key, expression in (overrides or {}).items():
+        if key in stage:
+            stage[key] = expression
+    return {"$project": stage}
@@ -0,0 +1,19 @@
+from typing import Dict, Any
+
+# /ads/sorted-all order: highest score first, newest first within a score
+PRIORITY_DESC = [("priority_score", -1), ("_id", -1)]
+
+
+def compute_priority_score(ad: Dict[str, Any]) -> int:
+    """
+    Ranking score stored on the ad as priority_score. Recomputed whenever the ad is
+    created, updated or approved (and by `migrate_ads.py priority_scores`).
+    """
+    score = 0
+
+    # Prioritize night-time / PM businesses
+    open_time = str((ad.get("business") or {}).get("openTime") or "").lower()
+    if "pm" in open_time or "night" in open_time:
+        score += 1
+
+    return score
@@ -0,0 +1,95 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Schedules are entered in Sri Lankan local time. Asia/Colombo has had no DST since 2006,
+# so a fixed offset avoids depending on the container's tz database.
+LOCAL_TZ = timezone(timedelta(hours=5, minutes=30), "Asia/Colombo")
+
+# "10:00-22:00", "10.00 - 22.00", "9am-10:30pm", "10:00 to 22:00"
+_RANGE = re.compile(
+    r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?\s*$",
+    re.IGNORECASE
+)
+_ALWAYS_OPEN = {"24 hours", "24h", "24/7", "open 24 hours"}
+
+
+def _minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> Optional[int]:
+    hours, minutes = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem.lower() == "pm" else 0)
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def parse_day_range(text: Any) -> Optional[Tuple[int, int]]:
+    """
+    (open, close) minutes after midnight for one schedule entry, or None if closed/unreadable.
+    close may exceed a day for overnight hours; "00:00-00:00" means closed, as the ad form says.
+    """
+    text = str(text or "").strip().lower()
+    if text in _ALWAYS_OPEN:
+        return 0, MINUTES_PER_DAY
+    match = _RANGE.match(text)
+    if not match:
+        return None
+    start = _minutes(match.group(1), match.group(2), match.group(3))
+    end = _minutes(match.group(4), match.group(5), match.group(6))
+    if start is None or end is None or start == end:
+        return None
+    if end < start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def open_intervals(schedule: Any) -> List[Dict[str, int]]:
+    """
+    The weekly schedule as sorted, merged [s, e) minute-of-week intervals (Monday 00:00 = 0),
+    stored on the ad as openIntervals. Overnight hours on Sunday wrap to Monday morning.
+    """
+    if not isinstance(schedule, dict):
+        return []
+
+    spans = []
+    for day_index, day in enumerate(DAYS):
+        entries = schedule.get(day)
+        if not isinstance(entries, list):
+            entries = [entries]
+        for entry in entries:
+            day_range = parse_day_range(entry)
+            if day_range is None:
+                continue
+            start = day_index * MINUTES_PER_DAY + day_range[0]
+            end = day_index * MINUTES_PER_DAY + day_range[1]
+            if end > MINUTES_PER_WEEK:
+                spans.append((0, end - MINUTES_PER_WEEK))
+                end = MINUTES_PER_WEEK
+            spans.append((start, end))
+
+    merged: List[List[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [{"s": start, "e": end} for start, end in merged]
+
+
+def minute_of_week(when: Optional[datetime] = None) -> int:
+    """Colombo-local minute of the week for `when` (naive datetimes are taken as Colombo time)"""
+    when = when or datetime.now(timezone.utc)
+    when = when.replace(tzinfo=LOCAL_TZ) if when.tzinfo is None else when.astimezone(LOCAL_TZ)
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def open_at_query(when: Optional[datetime] = None) -> Dict[str, Any]:
+    """Filter for ads open at `when` (default now); served by the openIntervals.s/e multikey index"""
+    minute = minute_of_week(when)
+    return {"openIntervals": {"$elemMatch": {"s": {"$lte": minute}, "e": {"$gt": minute}}}}
@@ -0,0 +1,100 @@
+import base64
+from typing import List, Tuple, Optional, Dict, Any
+
+from bson import json_util
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# [(field, 1 | -1), ...] - the last field must be unique (normally _id)
+SortSpec = List[Tuple[str, int]]
+
+# Latest-first ordering shared by the admin/listing endpoints
+CREATED_DESC: SortSpec = [("createdAt", -1), ("_id", -1)]
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort: SortSpec) -> str:
+    """Opaque token holding the sort key values of the last document on a page"""
+    payload = {"k": [field for field, _ in sort], "v": [_get_path(doc, field) for field, _ in sort]}
+    raw = json_util.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw)
+        fields, values = payload["k"], payload["v"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if fields != [field for field, _ in sort] or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Cursor does not match this listing")
+    return values
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """
+    Documents strictly after `values` in `sort` order:
+    (a > x) OR (a == x AND b > y) OR ...
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: prev_value for (prev_field, _), prev_value in zip(sort[:i], values[:i])}
+        clause[field] = {"$gt" if direction == 1 else "$lt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def apply_cursor(query: Dict[str, Any], sort: SortSpec, after: Optional[str]) -> Dict[str, Any]:
+    if not after:
+        return query
+    return {"$and": [query, keyset_filter(sort, decode_cursor(after, sort))]}
+
+
+def is_paginated(after: Optional[str], limit: Optional[int]) -> bool:
+    """Listings keep their legacy full-array response unless the client asks for pages"""
+    return after is not None or limit is not None
+
+
+def page_size(limit: Optional[int]) -> int:
+    return min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+
+def split_page(docs: List[Dict[str, Any]], limit: int, sort: SortSpec):
+    """`docs` is fetched with limit + 1; the extra document only signals that another page exists"""
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1], sort)
+    return docs, None
+
+
+async def find_page(
+        collection,
+        query: Dict[str, Any],
+        sort: SortSpec,
+        after: Optional[str],
+        limit: int,
+        projection: Optional[Dict[str, Any]] = None
+):
+    """One bounded, index-backed query per page. Returns (docs, next_cursor)."""
+    if projection and any(value for key, value in projection.items() if key != "_id"):
+        # Inclusion projections must keep the sort keys, the next cursor is built from them
+        projection = {**projection, **{field: 1 for field, _ in sort if field != "_id"}}
+    cursor = collection.find(apply_cursor(query, sort, after), projection).sort(sort).limit(limit + 1)
+    docs = await cursor.to_list(length=limit + 1)
+    return split_page(docs, limit, sort)
+
+
+def page_response(results: List[Any], next_cursor: Optional[str]) -> Dict[str, Any]:
+    return {"results": results, "next_cursor": next_cursor}
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+from typing import Optional, Tuple
+
+import brotli
+from cachetools import LRUCache
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Bodies smaller than this gain less than the Content-Encoding round trip costs
+MINIMUM_SIZE = 1024
+# Quality 4 / level 6: most of the size reduction for a fraction of the max-level CPU
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson", "application/javascript")
+
+# Hot, cacheable payloads whose compressed bytes are kept, keyed by ETag (or body digest)
+# and encoding, so identical bodies are compressed once per worker. Only paths whose body
+# repeats belong here (/ads/carousal-ads is a fresh $sample per request).
+PRECOMPRESSED_PATHS = {
+    "/categories/",
+    "/blog/",
+}
+PRECOMPRESSED_CACHE_BYTES = 16 * 1024 * 1024
+_compressed_cache: LRUCache = LRUCache(maxsize=PRECOMPRESSED_CACHE_BYTES, getsizeof=len)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br if the client takes it, then gzip; q=0 entries are refused"""
+    accepted, refused = set(), set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.replace(" ", "").removeprefix("q=")
+        try:
+            refuse = params and float(quality) == 0
+        except ValueError:
+            refuse = False
+        (refused if refuse else accepted).add(coding.strip())
+    for coding in ("br", "gzip"):
+        if coding not in refused and (coding in accepted or "*" in accepted):
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _cache_key(path: str, etag: Optional[str], body: bytes, encoding: str) -> Tuple[str, str, str]:
+    version = etag or hashlib.blake2b(body, digest_size=16).hexdigest()
+    return path, version, encoding
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for buffered responses over MINIMUM_SIZE. Streaming responses (e.g.
+    /ads/export) and bodies that are already encoded pass through untouched.
+    Compressed responses get a weak ETag, since the bytes differ from the identity
+    representation; If-None-Match compares weakly, so revalidation still hits.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if message.get("more_body") or not self._should_compress(start["status"], headers, body):
+                # Streamed or not worth it: replay the start message and stop looking.
+                # 304s and small 200s still carry the validator a compressed 200 would.
+                if "etag" in headers:
+                    self._negotiated(headers)
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self._compressed(path, headers.get("etag"), body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            self._negotiated(headers)
+
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _negotiated(headers: MutableHeaders):
+        """Vary on Accept-Encoding and weaken the ETag, the same on 200s and 304s"""
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    def _should_compress(self, status_code: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status_code < 200 or status_code in (204, 304) or len(body) < self.minimum_size:
+            return False
+        if "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def _compressed(self, path: str, etag: Optional[str], body: bytes, encoding: str) -> bytes:
+        if path not in PRECOMPRESSED_PATHS:
+            return compress(body, encoding)
+        key = _cache_key(path, etag, body, encoding)
+        compressed = _compressed_cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if len(compressed) <= PRECOMPRESSED_CACHE_BYTES:
+                _compressed_cache[key] = compressed
+        return compressed
+
+
+def compression_cache_stats() -> dict:
+    return {
+        "entries": len(_compressed_cache),
+        "bytes": _compressed_cache.currsize,
+        "max_bytes": _compressed_cache.maxsize,
+    }
@@ -0,0 +1,47 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from services.collection_version_service import collection_version
+
+# Browsers and nginx may reuse a response this long before revalidating with If-None-Match
+LIST_MAX_AGE_SECONDS = 60
+DETAIL_MAX_AGE_SECONDS = 30
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from whatever identifies the representation (version, id, query params)"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str, max_age: int) -> dict:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+
+def conditional(request: Request, response: Response, etag: str, max_age: int) -> Optional[Response]:
+    """
+    A 304 if the client already has `etag`; otherwise sets the cache headers on the
+    route's response and returns None so the route goes on to build the body.
+    """
+    headers = cache_headers(etag, max_age)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def collection_etag(name: str, *parts: Any) -> str:
+    return make_etag(name, await collection_version(name), *parts)